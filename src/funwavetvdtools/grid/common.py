@@ -1,4 +1,5 @@
 from funwavetvdtools.grid.variable import Variable
+import numpy as np
 from enum import Enum
 from abc import ABC, abstractmethod
 from collections import namedtuple
@@ -158,10 +159,10 @@ class Grid(ABC):
         # All metadatas are the same
         return True
 
-    def interpolate(self, gi):
+    def interpolate(self, gi, method=None, cache_dir=None, n_procs=None, **options):
         # Hack to avoid circular imports 
         from funwavetvdtools.grid.interpolation import interpolate
-        interpolate(gi, self)
+        interpolate(gi, self, method, cache_dir, n_procs, **options)
     
 
 def even_divide_range(num, div, off=0):
@@ -187,3 +188,53 @@ def linear(n, m, offset=0):
         i0 = i1
     
     return idxs
+
+
+GROUP_STATS = ['mean', 'median', 'min', 'max', 'count']
+
+def group_reduce(groups, values, stat='mean'):
+
+    """ Reduces values sharing the same group, e.g., points in the same cell. Groups are 
+        sorted once and each values array is reduced with a vectorized segment reduction, 
+        i.e., ufunc.reduceat.
+
+    :param groups: Integer group of each value.
+    :type  groups: ndarray of shape (n,)
+    :param values: Arrays of values to reduce.
+    :type  values: list of ndarrays of shape (n,)
+    :param stat:   Statistic of each group, one of GROUP_STATS.
+    :type  stat:   str
+
+    :rtype: tuple of unique groups ndarray, counts ndarray, and list of reduced values ndarrays
+    """
+
+    if not stat in GROUP_STATS:
+        raise Exception("Statistic '%s' not supported, must be one of %s." % (stat, GROUP_STATS))
+
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+
+    n = len(groups)
+    if n == 0: return groups, np.zeros(0, dtype=int), [np.zeros(0) for _ in values]
+
+    starts = np.flatnonzero(np.concatenate([[True], groups[1:] != groups[:-1]]))
+    counts = np.diff(np.concatenate([starts, [n]]))
+
+    reduced = []
+    for vals in values:
+        vals = np.asarray(vals)[order]
+
+        if stat == 'mean':
+            reduced.append(np.add.reduceat(vals, starts)/counts)
+        elif stat == 'min':
+            reduced.append(np.minimum.reduceat(vals, starts))
+        elif stat == 'max':
+            reduced.append(np.maximum.reduceat(vals, starts))
+        elif stat == 'count':
+            reduced.append(counts.astype(float))
+        else:
+            # Sorting values within groups, groups are already sorted
+            vals = vals[np.lexsort((vals, groups))]
+            reduced.append((vals[starts + (counts-1)//2] + vals[starts + counts//2])/2)
+
+    return groups[starts], counts, reduced
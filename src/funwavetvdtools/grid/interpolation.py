@@ -3,13 +3,372 @@
 from funwavetvdtools.grid.common import Grid, Type
 from funwavetvdtools.grid.structured import Node as StructNode
 from funwavetvdtools import validation as fv
-from funwavetvdtools.parallel.simple import simple as parallel_simple
+from funwavetvdtools.parallel.simple import simple as parallel_simple, cpu_count
+from funwavetvdtools.parallel.shared import SharedArray
+from funwavetvdtools.io.cache import _write_atomic
 
 from scipy.interpolate import RegularGridInterpolator
 from scipy.interpolate import CloughTocher2DInterpolator
+from scipy.spatial import Delaunay, cKDTree
+from scipy.sparse import csr_matrix
 import numpy as np
+import os
+import pickle
+import hashlib
+import warnings
 
-def interpolate(gi, go, **options):
+
+def _get_nodes(xo, yo):
+    xo, yo = np.meshgrid(xo, yo)
+    return np.column_stack([xo.ravel(), yo.ravel()])
+
+
+def _get_kdtree(xi, yi, kdtree):
+    return cKDTree(np.column_stack([xi, yi])) if kdtree is None else kdtree
+
+
+def _linear_weights(xi, yi, xo, yo, kdtree=None):
+
+    tri = Delaunay(np.column_stack([xi, yi]))
+    pts = _get_nodes(xo, yo)
+
+    simplex = tri.find_simplex(pts)
+    idx = np.nonzero(simplex >= 0)[0]
+
+    # Barycentric coordinates from affine transforms of simplices
+    trans = tri.transform[simplex[idx]]
+    b = np.einsum('ijk,ik->ij', trans[:, :2, :], pts[idx] - trans[:, 2, :])
+    weights = np.column_stack([b, 1 - b.sum(axis=1)])
+
+    rows = np.repeat(idx, 3)
+    cols = tri.simplices[simplex[idx]].ravel()
+
+    return csr_matrix((weights.ravel(), (rows, cols)), shape=(len(pts), len(xi))), simplex < 0
+
+
+def _nearest_weights(xi, yi, xo, yo, kdtree=None, max_distance=np.inf):
+
+    pts = _get_nodes(xo, yo)
+    dist, cols = _get_kdtree(xi, yi, kdtree).query(pts, distance_upper_bound=max_distance)
+
+    is_outside = ~np.isfinite(dist)
+    rows = np.nonzero(~is_outside)[0]
+
+    weights = csr_matrix((np.ones(len(rows)), (rows, cols[rows])), shape=(len(pts), len(xi)))
+    return weights, is_outside
+
+
+def _idw_weights(xi, yi, xo, yo, kdtree=None, k=8, power=2, max_distance=np.inf):
+
+    pts = _get_nodes(xo, yo)
+    k = min(fv.convert_pos_def_int(k, 'k'), len(xi))
+    dist, cols = _get_kdtree(xi, yi, kdtree).query(pts, k=k, distance_upper_bound=max_distance)
+    dist = dist.reshape(len(pts), k)
+    cols = cols.reshape(len(pts), k)
+
+    # Missing neighbours, i.e., beyond max_distance, have infinite distance and zero weight
+    is_found = np.isfinite(dist)
+    with np.errstate(divide='ignore'): weights = np.where(is_found, 1/dist**power, 0)
+
+    # Nodes coinciding with scatter points take value of the point
+    is_exact = dist[:, 0] == 0
+    weights[is_exact] = 0
+    weights[is_exact, 0] = 1
+
+    total = weights.sum(axis=1)
+    is_outside = total == 0
+    weights[~is_outside] /= total[~is_outside, None]
+
+    rows = np.repeat(np.arange(len(pts)), k)
+    weights = csr_matrix((weights[is_found], (rows[is_found.ravel()], cols[is_found])), shape=(len(pts), len(xi)))
+    return weights, is_outside
+
+
+def _bin_cells(s, so):
+    # Cells centered on nodes with edges at mid-points between nodes
+    if len(so) == 1: return np.zeros(len(s), dtype=int)
+    mids = (so[1:] + so[:-1])/2
+    edges = np.concatenate([[2*so[0] - mids[0]], mids, [2*so[-1] - mids[-1]]])
+    idx = np.searchsorted(edges, s, side='right') - 1
+    idx[(s < edges[0]) | (s > edges[-1])] = -1
+    return idx
+
+
+def _bin_weights(xi, yi, xo, yo, kdtree=None, min_count=1):
+
+    ix = _bin_cells(xi, xo)
+    iy = _bin_cells(yi, yo)
+
+    idx = np.nonzero((ix >= 0) & (iy >= 0) & (ix < len(xo)) & (iy < len(yo)))[0]
+    rows = iy[idx]*len(xo) + ix[idx]
+
+    # Averaging all scatter points in the cell of each node
+    counts = np.bincount(rows, minlength=len(xo)*len(yo))
+    is_outside = counts < max(min_count, 1)
+
+    weights = 1/counts[rows]
+    weights = csr_matrix((weights, (rows, idx)), shape=(len(xo)*len(yo), len(xi)))
+    return weights, is_outside
+
+
+# Scatter to structured methods represented by sparse weight matrices
+METHODS = {'linear' : _linear_weights,
+           'nearest': _nearest_weights,
+           'idw'    : _idw_weights,
+           'bin'    : _bin_weights}
+
+
+def register_method(name, func):
+
+    """ Registers a scatter to structured interpolation method
+
+    :param name: Name of method, used as the method argument of interpolate.
+    :type  name: str
+    :param func: Function computing the weights, called as func(xi, yi, xo, yo, kdtree=None, **options)
+                 and returning a sparse matrix of shape (len(yo)*len(xo), len(xi)) and a bool array 
+                 flagging nodes without data. Nodes are ordered row-major, i.e., x varies fastest.
+    :type  func: function
+    """
+
+    if name == 'cubic':
+        raise Exception("Can not register method 'cubic', name is reserved for Clough-Tocher interpolation.")
+
+    METHODS[name] = func
+
+
+class InterpolationPlan():
+
+    """ Scatter to structured interpolation plan. The weights of the scatter points are 
+        computed once for every target node, e.g., barycentric weights of the simplex 
+        containing the node for linear interpolation, and stored as a sparse matrix, so any
+        number of variables or time steps on the same scatter points are interpolated with
+        a sparse matrix-vector product. Cubic interpolation triangulates once and reuses
+        the triangulation with CloughTocher2DInterpolator.
+
+    :param xi:         x coordinates of scatter points.
+    :type  xi:         ndarray
+    :param yi:         y coordinates of scatter points.
+    :type  yi:         ndarray
+    :param xo:         x coordinates of structured grid.
+    :type  xo:         ndarray
+    :param yo:         y coordinates of structured grid.
+    :type  yo:         ndarray
+    :param method:     Interpolation method, 'cubic' or a method in METHODS, i.e., 'linear', 
+                       'nearest', 'idw' (inverse distance weighting), or 'bin' (average of
+                       points in the cell of each node).
+    :type  method:     str
+    :param fill_value: Value of nodes without data, e.g., outside convex hull of scatter points.
+    :type  fill_value: float
+    :param kdtree:     KD tree of scatter points, e.g., Scatter KD tree, created if required and None.
+    :type  kdtree:     scipy.spatial.KDTree or None
+    :param options:    Options of method, e.g., k and power for 'idw', or options passed to 
+                       CloughTocher2DInterpolator for 'cubic'.
+    """
+
+    def __init__(self, xi, yi, xo, yo, method='cubic', fill_value=np.nan, kdtree=None, **options):
+
+        if method != 'cubic' and method not in METHODS:
+            raise Exception("Interpolation method '%s' not supported, must be one of %s." % (method, ['cubic'] + list(METHODS)))
+
+        self._method = method
+        self._fill_value = fill_value
+        self._options = options
+
+        self._npts = len(xi)
+        self._shape = (len(yo), len(xo))
+
+        if method == 'cubic':
+            self._tri = Delaunay(np.column_stack([xi, yi]))
+            self._pts = _get_nodes(xo, yo)
+            self._is_outside = self._tri.find_simplex(self._pts) < 0
+            self._weights = None
+        else:
+            self._tri = None
+            self._pts = None
+            self._weights, self._is_outside = METHODS[method](xi, yi, xo, yo, kdtree=kdtree, **options)
+
+    @property
+    def method(self): return self._method
+
+    @property
+    def shape(self): return self._shape
+
+    @property
+    def npts(self): return self._npts
+
+    @property
+    def tri(self): return self._tri
+
+    @property
+    def weights(self): return self._weights
+
+    @property
+    def is_outside(self): return self._is_outside.reshape(self._shape)
+
+    def apply(self, values):
+
+        """ Interpolates values on scatter points to structured grid
+
+        :param values: Values of one variable or stacked values of k variables or time steps.
+        :type  values: ndarray of shape (npts,) or (npts, k)
+
+        :rtype: ndarray of shape (ny, nx) or (ny, nx, k)
+        """
+
+        values = np.asarray(values)
+        if not values.shape[0] == self._npts:
+            raise Exception("Number of values, %d, not the same as number of scatter points, %d." % (values.shape[0], self._npts))
+
+        if self._weights is not None:
+            datao = self._weights @ values
+            datao[self._is_outside] = self._fill_value
+        else:
+            interp = CloughTocher2DInterpolator(self._tri, values, fill_value=self._fill_value, **self._options)
+            datao = interp(self._pts)
+
+        return datao.reshape(self._shape + values.shape[1:])
+
+    @staticmethod
+    def get_key(xi, yi, xo, yo, method='cubic', fill_value=np.nan, **options):
+
+        """ Computes key of a plan, a hash of the scatter and structured coordinates,
+            method, and options
+
+        :rtype: str
+        """
+
+        h = hashlib.sha1()
+        for arr in [xi, yi, xo, yo]:
+            arr = np.ascontiguousarray(arr, dtype=np.float64)
+            h.update(str(arr.shape).encode())
+            h.update(arr)
+
+        h.update(repr((method, fill_value, sorted(options.items()))).encode())
+
+        return h.hexdigest()
+
+    def save(self, fpath):
+
+        """ Saves plan, written atomically. Weight plans, i.e., all methods except 'cubic',
+            are saved as arrays in a .npz file that is loaded without pickle. Cubic plans
+            contain a Delaunay triangulation and are pickled, hence only load cubic plans
+            from trusted files.
+
+        :param fpath: Path to plan file.
+        :type  fpath: str
+        """
+
+        if self._weights is None:
+            write = lambda fh: pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            weights = csr_matrix(self._weights)
+            arrays = {'method': np.array(self._method), 'fill_value': np.array(self._fill_value, dtype=np.float64),
+                      'shape': np.array(self._shape), 'npts': np.array(self._npts),
+                      'is_outside': self._is_outside, 'data': weights.data, 'indices': weights.indices, 
+                      'indptr': weights.indptr}
+            write = lambda fh: np.savez(fh, **arrays)
+
+        _write_atomic(os.path.abspath(fpath), write)
+
+    @classmethod
+    def load(cls, fpath):
+
+        """ Loads plan saved with save. Files ending in .npz are loaded without pickle,
+            any other file is unpickled and must be trusted, see save.
+
+        :param fpath: Path to plan file.
+        :type  fpath: str
+
+        :rtype: InterpolationPlan
+        """
+
+        fv.check_fpath(fpath, 'fpath')
+
+        if fpath.endswith('.npz'): return cls._load_weights(fpath)
+
+        with open(fpath, 'rb') as fh: plan = pickle.load(fh)
+
+        if not type(plan) is cls:
+            raise Exception("File '%s' does not contain an interpolation plan." % fpath)
+
+        return plan
+
+    @classmethod
+    def _load_weights(cls, fpath):
+
+        with np.load(fpath, allow_pickle=False) as data:
+            shape = tuple(int(n) for n in data['shape'])
+            npts = int(data['npts'])
+
+            plan = cls.__new__(cls)
+            plan._method = str(data['method'])
+            plan._fill_value = float(data['fill_value'])
+            plan._options = {}
+            plan._npts = npts
+            plan._shape = shape
+            plan._tri = None
+            plan._pts = None
+            plan._is_outside = data['is_outside'].astype(bool)
+            plan._weights = csr_matrix((data['data'], data['indices'], data['indptr']), 
+                                       shape=(shape[0]*shape[1], npts))
+
+        return plan
+
+    @classmethod
+    def cached(cls, xi, yi, xo, yo, method='cubic', cache_dir=None, fill_value=np.nan, kdtree=None, **options):
+
+        """ Loads plan from cache directory if a plan with the same key exists, otherwise
+            creates plan and saves it to the cache directory. Changing only the values
+            interpolated reuses the cached plan.
+
+        :param cache_dir: Cache directory, plan is not cached if None.
+        :type  cache_dir: str or None
+
+        See InterpolationPlan for remaining arguments.
+
+        :rtype: InterpolationPlan
+        """
+
+        if cache_dir is None: return cls(xi, yi, xo, yo, method, fill_value, kdtree, **options)
+
+        # NOTE: Only cubic plans are pickled, see save
+        key = InterpolationPlan.get_key(xi, yi, xo, yo, method, fill_value, **options)
+        fpath = os.path.join(cache_dir, 'plan.%s.%s' % (key, 'pkl' if method == 'cubic' else 'npz'))
+
+        if os.path.isfile(fpath):
+            try:
+                return cls.load(fpath)
+            except Exception:
+                warnings.warn("Could not read cached plan '%s', recreating plan." % fpath)
+
+        plan = cls(xi, yi, xo, yo, method, fill_value, kdtree, **options)
+
+        # NOTE: Failing to write cache, e.g., read-only directory, is not fatal
+        try:
+            plan.save(fpath)
+        except OSError as e:
+            warnings.warn("Could not write cached plan '%s': %s" % (fpath, e))
+
+        return plan
+
+
+def interpolate(gi, go, method=None, cache_dir=None, n_procs=None, **options):
+
+    """ Interpolates variables of input grid onto output grid
+
+    :param gi:        Input grid, scatter or structured.
+    :type  gi:        Grid
+    :param go:        Output grid, structured.
+    :type  go:        Grid
+    :param method:    Interpolation method, defaults to 'cubic' for scatter input grids, see
+                      METHODS, and 'linear' for structured input grids, see
+                      scipy.interpolate.RegularGridInterpolator.
+    :type  method:    str or None
+    :param cache_dir: Directory of cached interpolation plans, scatter input grids only.
+    :type  cache_dir: str or None
+    :param n_procs:   Number of processes for tiled output grids, scatter input grids only.
+    :type  n_procs:   int or None
+    """
 
     fv.check_subclass(gi, Grid, 'gi')
     fv.check_subclass(go, Grid, 'go')
@@ -25,9 +384,15 @@ def interpolate(gi, go, **options):
     int_type = (gi.type, go.type)
 
     if int_type == (Type.SCATTER, Type.STRUCTURED):
-        _scatter_2_grid(gi, go, **options)
+        if method is None: method = 'cubic'
+        _scatter_2_grid(gi, go, method, cache_dir, n_procs, **options)
+    elif int_type == (Type.STRUCTURED, Type.STRUCTURED):
+        if cache_dir is not None or n_procs is not None:
+            raise ValueError("Arguments cache_dir and n_procs are only supported for scatter input grids")
+        if method is None: method = 'linear'
+        _grid_2_grid(gi, go, method, **options)
     else:
-        msg = "Interploation from grid type %s to grid type %s not implemented." % (gi.type.name, gi.type.name)
+        msg = "Interploation from grid type %s to grid type %s not implemented." % (gi.type.name, go.type.name)
         raise NotImplementedError(msg)
 
 
@@ -57,70 +422,91 @@ def __scatter_2_grid_inplace(gi, go, iplace=False,  **options):
     
         if np.isnan(datao).any(): print("WARNING")
 
-def __scatter_2_grid(ptsi, xo, yo, datai, datao, inplace=True, **options):
+def __scatter_2_grid(xi, yi, xo, yo, datai, method, cache_dir, options, kdtree=None):
 
-    xo, yo = np.meshgrid(xo, yo)
+    plan = InterpolationPlan.cached(xi, yi, xo, yo, method, cache_dir, kdtree=kdtree, **options)
+    datao = plan.apply(np.column_stack(datai))
 
-    for datumi, datumo in zip(datai, datao):
-        interp = CloughTocher2DInterpolator(ptsi, datumi, **options)
-        #In inplace mode, data is copy into array instead of replacing array reference 
-        datumo[:,:] = interp(xo, yo)[:,:]
-        if np.isnan(datumo).any(): print("WARNING")
-    # If in parallel mode data can not be copied inplace
-    if not inplace: return datao
+    if np.isnan(datao).any(): warnings.warn("Interpolated data contains NaN values, e.g., nodes outside scatter points.")
 
-def _scatter_2_grid(gi, go, **options):
+    # Returning stacked data of shape (ny, nx, n_vars)
+    return datao
 
-    if not issubclass(type(go), StructNode):
-        __scatter_2_grid(gi, go, **options)
-    else:
 
-        # NOTE: Due to restrictions of multiprocessing coupled with dynamics named tuples
-        #       data has to be unwrapped from classes before parallel execution 
-        def prep_args(gi ,go):
-            ptsi = list(zip(gi.x, gi.y))
-            xo, yo = go.x, go.y
-           
-            if not go.has_vars:
-                ny, nx = go.shape
-                variables = [var.create_metadata_copy(np.zeros([ny,nx])) for var in gi.vars]
-                go._add_variables(variables)
-            
-            datai = list(gi.data)
-            datao = list(go.data)
-        
-            return ptsi, xo, yo, datai, datao
+def _init_vars(gi, go):
+    if not go.has_vars:
+        ny, nx = go.shape
+        variables = [var.create_metadata_copy(np.zeros([ny,nx])) for var in gi.vars]
+        go._add_variables(variables)
 
-        if not gi.is_kdtree: gi.create_kd_tree()
 
+def __scatter_2_tile(xi, yi, datai, idxs, datao, k0, k1, i0, i1, j0, j1, xo, yo, method, cache_dir, options):
 
-        args_list = [prep_args(*(gi.crop(*go_sub.bounding_box(pad_ratio=0.2)), go_sub)) for go_sub in go.child_iter()]
+    try:
+        # Reading points of tile from shared memory, see _scatter_2_grid
+        idx = idxs.array[k0:k1]
+        datao.array[:, j0:j1, i0:i1] = np.moveaxis(__scatter_2_grid(xi.array[idx], yi.array[idx], xo, yo,
+                                                                    list(datai.array[:, idx]), method, cache_dir,
+                                                                    options), 2, 0)
+    finally:
+        # Detaching from shared memory blocks owned by parent process
+        for arr in [xi, yi, datai, idxs, datao]:
+            if not arr.is_owner: arr.close()
 
-        n_procs = 4
-        inplace = n_procs == 1
 
-        common_args = inplace
-        return_args = parallel_simple(__scatter_2_grid, n_procs, args_list, common_args)
+def _scatter_2_grid(gi, go, method='cubic', cache_dir=None, n_procs=None, **options):
 
-        # Copying data in gathered from parallel processes  
-        if not inplace:       
-            for (*_, datao), new_data in zip(args_list, return_args):
-                for datumo, new_datum in zip(datao, new_data): datumo[:,:] = new_datum[:,:] 
+    if not issubclass(type(go), StructNode) or not go.has_children:
+        _init_vars(gi, go)
+        kdtree = gi._kdtree if gi.is_kdtree else None
+        datao = __scatter_2_grid(gi.x, gi.y, go.x, go.y, list(gi.data), method, cache_dir, options, kdtree)
+        for k, datumo in enumerate(go.data): datumo[:,:] = datao[:,:,k]
+        return
 
-        go.copy_children_vars(False)
+    if n_procs is None: n_procs = cpu_count()
+    n_procs = fv.convert_pos_def_int(n_procs, 'n_procs')
 
+    if not gi.is_kdtree: gi.create_kd_tree()
 
-        
- 
+    # Indices of scatter points in padded bounding box of each tile, concatenated 
+    go_subs = list(go.child_iter())
+    tile_idxs = [gi._crop_kdtree(*go_sub.bounding_box(pad_ratio=0.2)).filts[0] for go_sub in go_subs]
+    offsets = np.concatenate([[0], np.cumsum([len(idx) for idx in tile_idxs])])
 
-    
+    ny, nx = go.shape
+    n_vars = len(gi.vars)
 
+    # NOTE: Input points, data and output grid are placed in shared memory, so parallel jobs 
+    #       only receive the names of the shared blocks and write their tile in place
+    with SharedArray.from_array(gi.x) as xi, SharedArray.from_array(gi.y) as yi, \
+         SharedArray.from_array(np.vstack(list(gi.data))) as datai, \
+         SharedArray.from_array(np.concatenate(tile_idxs).astype(np.int64)) as idxs, \
+         SharedArray([n_vars, ny, nx]) as datao:
 
+        args_list = [(xi, yi, datai, idxs, datao, offsets[k], offsets[k+1], *go_sub.idxs, go_sub.x, go_sub.y)
+                     for k, go_sub in enumerate(go_subs)]
+        common_args = (method, cache_dir, options)
+        parallel_simple(__scatter_2_tile, min(n_procs, len(args_list)), args_list, common_args)
+
+        if go.has_vars:
+            for k, datumo in enumerate(go.data): datumo[:,:] = datao.array[k]
+        else:
+            go._add_variables([var.create_metadata_copy(datao.array[k].copy()) for k, var in enumerate(gi.vars)])
+
+    # Setting variables of tiles as views of grid
+    for go_sub in go_subs:
+        i0, i1, j0, j1 = go_sub.idxs
+        go_sub._add_variables([var.create_metadata_copy(var.data[j0:j1, i0:i1]) for var in go.vars])
 
-    
-    
-     
 
+def _grid_2_grid(gi, go, method='linear', fill_value=np.nan, **options):
 
+    _init_vars(gi, go)
 
+    # Interpolating all variables stacked along the last axis in one call
+    datai = np.stack(list(gi.data), axis=-1)
+    interp = RegularGridInterpolator((gi.y, gi.x), datai, method=method, bounds_error=False, 
+                                     fill_value=fill_value, **options)
 
+    datao = interp(_get_nodes(go.x, go.y)[:, ::-1]).reshape(go.shape + (len(gi.vars),))
+    for k, datumo in enumerate(go.data): datumo[:,:] = datao[:,:,k]
@@ -1,4 +1,4 @@
-from funwavetvdtools.grid.common import Type, Grid, classproperty
+from funwavetvdtools.grid.common import Type, Grid, classproperty, group_reduce
 from funwavetvdtools.grid.variable import Variable
 from funwavetvdtools.grid.filter import Index as IdxFilt
 import numpy as np
@@ -9,7 +9,7 @@ class Scatter(Grid):
     
     def create_kd_tree(self):    
         if (self._is_kdtree):
-            warning.warn('KD Tree already created.')
+            warnings.warn('KD Tree already created.')
             return
        
         pts = np.vstack([self.x, self.y]).T 
@@ -23,7 +23,7 @@ class Scatter(Grid):
     def type(self): return Type.SCATTER
 
     @classmethod
-    def from_raw(cls, raw_data, create_kd_tree=False):
+    def from_raw(cls, raw_data, create_kd_tree=False, resolution=None, stat='mean', origin=None, is_center=False):
 
         x = Variable(raw_data[:,0], 'x')
         y = Variable(raw_data[:,1], 'y')
@@ -37,7 +37,74 @@ class Scatter(Grid):
         else:
             data = [Variable(raw_data[:,i], 'z%d' % (i-2)) for i in range(2,n)] 
 
-        return cls(x, y, data, create_kd_tree=False)     
+        if resolution is None: return cls(x, y, data, create_kd_tree=create_kd_tree)
+
+        # Decimating before creating KD tree of reduced points
+        return cls(x, y, data).decimate(resolution, stat, origin, is_center, create_kd_tree)
+
+    def decimate(self, resolution, stat='mean', origin=None, is_center=False, create_kd_tree=False):
+
+        """ Thins points by collapsing all points in the same cell of a regular grid into one 
+            point, e.g., dense survey data much finer than the model grid.
+
+        :param resolution:     Cell size, either same or (dx, dy) in each direction.
+        :type  resolution:     float or tuple
+        :param stat:           Statistic of variables in each cell, see common.GROUP_STATS. For
+                               'count', variables are replaced by a single 'count' variable.
+        :type  stat:           str
+        :param origin:         Lower left corner of cells, defaults to minimum x and y of points.
+                               Use node minus half the resolution to center cells on grid nodes.
+        :type  origin:         tuple or None
+        :param is_center:      Flag for placing points at cell centers instead of the mean
+                               location of points in each cell.
+        :type  is_center:      bool
+        :param create_kd_tree: Flag for creating KD tree of reduced points.
+        :type  create_kd_tree: bool
+
+        :rtype: Scatter
+        """
+
+        dx, dy = (resolution, resolution) if np.ndim(resolution) == 0 else resolution
+        if dx <= 0 or dy <= 0: raise Exception("Resolution must be positive, got (%s, %s)" % (dx, dy))
+
+        if self.npts == 0: raise Exception("Can not decimate scatter without points")
+
+        if origin is None: origin = (self.x.min(), self.y.min())
+        x0, y0 = origin
+
+        ix = np.floor((self.x - x0)/dx).astype(np.int64)
+        iy = np.floor((self.y - y0)/dy).astype(np.int64)
+
+        # Shifting cells of points below origin to keep cell ids positive
+        ix0 = min(ix.min(), 0)
+        iy0 = min(iy.min(), 0)
+        ncx = ix.max() - ix0 + 1
+
+        cells = (iy - iy0)*ncx + (ix - ix0)
+
+        values = [] if not self.has_vars or stat == 'count' else list(self.data)
+        if is_center:
+            cells, counts, reduced = group_reduce(cells, values, stat)
+            x = x0 + (cells % ncx + ix0 + 0.5)*dx
+            y = y0 + (cells // ncx + iy0 + 0.5)*dy
+        elif stat == 'mean':
+            _, counts, (x, y, *reduced) = group_reduce(cells, [self.x, self.y] + values, stat)
+        else:
+            # Mean location of points in each cell
+            _, counts, (x, y) = group_reduce(cells, [self.x, self.y], 'mean')
+            _, counts, reduced = group_reduce(cells, values, stat)
+
+        sub_x = self.x_var.create_metadata_copy(x)
+        sub_y = self.y_var.create_metadata_copy(y)
+
+        if not self.has_vars:
+            sub_vars = None
+        elif stat == 'count':
+            sub_vars = Variable(counts.astype(float), 'count')
+        else:
+            sub_vars = [var.create_metadata_copy(datum) for var, datum in zip(self.vars, reduced)]
+
+        return Scatter(sub_x, sub_y, sub_vars, create_kd_tree=create_kd_tree)
 
 
     def __init__(self, x, y, variables=None, create_kd_tree=False):
@@ -52,8 +119,8 @@ class Scatter(Grid):
         super().__init__(x, y, variables)
         
         self._kdtree = None
-        self._is_kdtree = create_kd_tree
-        if (self._is_kdtree): self.create_kd_tree()
+        self._is_kdtree = False
+        if (create_kd_tree): self.create_kd_tree()
 
 
     @property
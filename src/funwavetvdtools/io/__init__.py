@@ -0,0 +1 @@
+from .series import FieldSeries
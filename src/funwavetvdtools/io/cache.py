@@ -0,0 +1,106 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file cache.py
+#
+# @brief Binary .npy cache of parsed text files, e.g., depth and sta_XXXX files
+#
+# @section description_cache Description
+# Parsed arrays are saved to a cache directory under a name keyed by the absolute
+# path, modification time and size of the source file. Subsequent loads memory-map
+# the cache instead of re-parsing the text file. Modifying the source file changes
+# the key, so stale caches are never read.
+#
+
+import funwavetvdtools.validation as fv
+
+import os
+import hashlib
+import tempfile
+import warnings
+import numpy as np
+
+CACHE_DIR_NAME = '.funwave_cache'
+
+
+def get_cache_path(fpath, tag='', cache_dir=None):
+
+    """ Computes path of cache file for a source file
+
+    :param fpath:     Path to source text file.
+    :type  fpath:     str
+    :param tag:       Identifier of the parser, distinguishes caches of the same file
+                      parsed differently.
+    :type  tag:       str
+    :param cache_dir: Cache directory, defaults to '.funwave_cache' in the directory of fpath.
+    :type  cache_dir: str or None
+
+    :rtype: str
+    """
+
+    fpath = os.path.abspath(fpath)
+    stat = os.stat(fpath)
+
+    if cache_dir is None: cache_dir = os.path.join(os.path.dirname(fpath), CACHE_DIR_NAME)
+
+    key = "%s:%d:%d:%s" % (fpath, stat.st_mtime_ns, stat.st_size, tag)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    return os.path.join(cache_dir, "%s.%s.npy" % (os.path.basename(fpath), digest))
+
+
+def _write_atomic(cpath, write):
+
+    # Writing to temporary file before renaming so partially written
+    # caches are never read by concurrent or interrupted processes
+    cache_dir = os.path.dirname(cpath)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh: write(fh)
+        os.replace(tmp_path, cpath)
+    except Exception:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+
+
+def _write(cpath, data):
+    _write_atomic(cpath, lambda fh: np.save(fh, data))
+
+
+def load(fpath, parse, tag='', cache_dir=None):
+
+    """ Loads array parsed from a text file, memory-mapping the cache if it exists or
+        parsing the file and writing the cache otherwise
+
+    :param fpath:     Path to source text file.
+    :type  fpath:     str
+    :param parse:     Function parsing the text file, called as parse(fpath).
+    :type  parse:     function
+    :param tag:       Identifier of the parser, see get_cache_path.
+    :type  tag:       str
+    :param cache_dir: Cache directory, see get_cache_path.
+    :type  cache_dir: str or None
+
+    :rtype: ndarray or memmap
+    """
+
+    fv.check_fpath(fpath, 'fpath')
+    cpath = get_cache_path(fpath, tag, cache_dir)
+
+    if os.path.isfile(cpath):
+        try:
+            return np.load(cpath, mmap_mode='r')
+        except Exception:
+            warnings.warn("Could not read cache file '%s', reparsing '%s'." % (cpath, fpath))
+
+    data = parse(fpath)
+
+    # NOTE: Failing to write cache, e.g., read-only output directory, is not fatal
+    try:
+        _write(cpath, data)
+    except OSError as e:
+        warnings.warn("Could not write cache file '%s': %s" % (cpath, e))
+
+    return data
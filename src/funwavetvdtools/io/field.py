@@ -2,74 +2,124 @@
 
 from funwavetvdtools.error import FunException
 import funwavetvdtools.validation as fv
+from funwavetvdtools.parallel.prefetch import prefetch
+from funwavetvdtools.io.text import read_table
+import funwavetvdtools.io.cache as fc
 
 import os
 import mimetypes
 import numpy as np
 
-def read(fpath, mglob=None, nglob=None, stride=1):
+def read(fpath, mglob=None, nglob=None, stride=1, is_mmap=False, i0=None, i1=None, j0=None, j1=None,
+         is_cache=False, cache_dir=None):
 
     fv.check_fpath(fpath, 'fpath')
 
     mtype, _ = mimetypes.guess_type(fpath, strict=True)
 
     stride = fv.convert_pos_def_int(stride, 'stride')
+    window = (i0, i1, j0, j1)
 
     # Detecting if file is a binary file or text file
     if mtype == 'text/plain':
-        return _read_text(fpath, mglob, nglob, stride)
+        if is_cache:
+            return _read_text_cached(fpath, mglob, nglob, stride, *window, cache_dir, is_mmap)
+        if is_mmap:
+            msg = "Can not memory-map text file '%s' unless cached, set is_cache=True." % fpath
+            raise FunException(msg, ValueError)
+        return _read_text(fpath, mglob, nglob, stride, *window)
     elif mtype is None:
         # Assuming binary file if None is returned
-        return _read_binary(fpath, mglob, nglob, stride)
+        return _read_binary(fpath, mglob, nglob, stride, is_mmap, *window)
     else:
         msg = "Can not read field data, detect mime type '%s' for file '%s'." % (mtype, fpath)  
         raise FunException(msg, TypeError)
 
 
-def _check_size(val_arg, val_read, val_str, fpath):
+def iter_read(fpaths, mglob=None, nglob=None, stride=1, i0=None, i1=None, j0=None, j1=None, n_workers=2, depth=4):
 
-    val_arg = fv.convert_pos_def_int(val_arg, val_str)
-    
-    if val_arg > val_read:
-        msg = "Input argument %s=%d is larger than dimension read, %s=%d, in " \
-                "text file '%s'." % (val_str, val_arg, val_str, val_read, fpath)
-        raise FunException(msg, ValueError)
+    """ Streams field data from a list of files, reading the next files ahead on a thread
+        pool while the consumer processes the current one
 
-    return val_arg
+    :param fpaths:    Paths of field data files, e.g., eta_00001, eta_00002, ...
+    :type  fpaths:    list
+    :param n_workers: Number of reader threads.
+    :type  n_workers: int
+    :param depth:     Maximum number of files read ahead of the consumer, bounds memory usage.
+    :type  depth:     int
 
+    :rtype: generator
+    """
 
-def _read_text(fpath, mglob, nglob, stride):
+    common_args = (mglob, nglob, stride, False, i0, i1, j0, j1)
+    return prefetch(read, list(fpaths), common_args, n_workers, depth)
 
-    data = np.loadtxt(fpath)
-    n, m = data.shape
 
-    if mglob is not None:
-        mglob = _check_size(mglob, m, "mglob", fpath)
-        data = data[:,0:mglob]
+def _check_window(i0, i1, j0, j1, m, n):
+
+    # NOTE: Window indices are zero-based with exclusive upper bounds, i.e., 
+    #       data[j0:j1,i0:i1], consistent with the indices of grid.structured.Node.
+    #       Upper bounds of None are left unresolved if the dimension, m or n, is unknown. 
+    def check_range(s0, s1, ns, s0_str, s1_str):
+
+        s0 = 0 if s0 is None else fv.convert_pos_int(s0, s0_str)
+        if s1 is None: return s0, ns
+
+        s1 = fv.convert_pos_def_int(s1, s1_str)
+        if ns is not None: s1 = fv.convert_max_val_int(s1, ns, s1_str)
+
+        if s0 >= s1:
+            msg = "Invalid window, %s=%d must be less than %s=%d." % (s0_str, s0, s1_str, s1)
+            raise FunException(msg, ValueError)
+
+        return s0, s1
+
+    i0, i1 = check_range(i0, i1, m, 'i0', 'i1')
+    j0, j1 = check_range(j0, j1, n, 'j0', 'j1')
 
-    if nglob is not None: 
-        nglob = _check_size(nglob, n, "nglob", fpath)
-        data = data[0:nglob,:]
+    return i0, i1, j0, j1
+
+
+def _read_text(fpath, mglob, nglob, stride, i0=None, i1=None, j0=None, j1=None):
+
+    if mglob is not None: mglob = fv.convert_pos_def_int(mglob, 'mglob')
+    if nglob is not None: nglob = fv.convert_pos_def_int(nglob, 'nglob')
+
+    i0, i1, j0, j1 = _check_window(i0, i1, j0, j1, mglob, nglob)
+
+    # Skipping rows and columns outside of window instead of parsing the full file
+    max_rows = None if j1 is None else j1 - j0
+    usecols = None if i1 is None else range(i0, i1)
+
+    data = read_table(fpath, usecols, j0, max_rows)
+
+    if usecols is None: data = data[:,i0:]
+
+    n, m = data.shape
+
+    if max_rows is not None and n < max_rows:
+        msg = "Window upper bound j1=%d is larger than number of rows, %d, in text file '%s'." % (j1, j0+n, fpath)
+        raise FunException(msg, ValueError)
 
     return data[::stride,::stride]
 
 
-def _read_binary(fpath, mglob, nglob, stride):
+def _read_text_cached(fpath, mglob, nglob, stride, i0, i1, j0, j1, cache_dir=None, is_mmap=False):
 
-    if mglob is None:
-        msg = "Input argument mglob needs to be specifed for binary data file '%s'." % fpath
-        raise FunException(msg, NameError)
+    # Caching full table so any window can be sliced from the memory-mapped cache
+    data = fc.load(fpath, read_table, 'table', cache_dir)
+    n, m = data.shape
 
-    if nglob is None:
-        msg = "Input argument nglob needs to be specifed for binary data file '%s'." % fpath
-        raise FunException(msg, NameError)
+    if mglob is not None: m = fv.convert_max_val_int(mglob, m, 'mglob')
+    if nglob is not None: n = fv.convert_max_val_int(nglob, n, 'nglob')
 
+    i0, i1, j0, j1 = _check_window(i0, i1, j0, j1, m, n)
+    data = data[j0:j1:stride,i0:i1:stride]
 
-    mglob = fv.convert_pos_def_int(mglob, 'mglob')
-    nglob = fv.convert_pos_def_int(nglob, 'nglob')
+    return data if is_mmap else np.array(data)
 
-#    _check_positive_def_int(mglob, 'mglob')
-#    _check_positive_def_int(nglob, 'nglob')
+
+def _get_binary_dtype(fpath, mglob, nglob):
 
     # NOTE: May need to revise check for very large files 
 
@@ -79,17 +129,75 @@ def _read_binary(fpath, mglob, nglob, stride):
     # Assuming little-endian float or double
 
     if fsize_per_item == 8:
-        dtype = '<f8'
+        return '<f8'
     elif fsize_per_item == 4:
-        dtype = '<f4'
+        return '<f4'
     else:
         msg = "Failed to read binary field data, detected %.2f bytes per point, " \
                 "expected 4 (single-precision) or 8 (double-precision)." % fsize_per_item
         raise FunException(msg, ValueError)
- 
-    data = np.fromfile(fpath, dtype)
-    data = data.reshape([nglob, mglob])
 
-    return data[::stride,::stride]
+
+def _read_binary_window(fpath, dtype, mglob, i0, i1, j0, j1, si=1, sj=1, out=None):
+
+    itemsize = np.dtype(dtype).itemsize
+
+    rows = range(j0, j1, sj)
+    ni = i1 - i0
+    shape = (len(rows), len(range(i0, i1, si)))
+
+    if out is None: 
+        out = np.empty(shape, dtype)
+    elif out.shape != shape:
+        msg = "Output array shape %s does not match window shape %s." % (out.shape, shape)
+        raise FunException(msg, ValueError)
+
+    with open(fpath, 'rb') as fh:
+
+        # Reading contiguous block of full rows directly into output array in a single call
+        is_block = i0 == 0 and i1 == mglob and si == 1 and sj == 1
+        if is_block and out.flags.c_contiguous and out.dtype == np.dtype(dtype):
+            fh.seek(j0*mglob*itemsize)
+            n_read = fh.readinto(out)
+            if n_read != out.nbytes:
+                msg = "Unexpected end of binary data file '%s'." % fpath
+                raise FunException(msg, EOFError)
+            return out
+
+        # Seeking row by row and reading only the columns in the window
+        for k, j in enumerate(rows):
+            fh.seek((j*mglob + i0)*itemsize)
+            out[k,:] = np.fromfile(fh, dtype, count=ni)[::si]
+
+    return out
+
+
+def _read_binary(fpath, mglob, nglob, stride, is_mmap=False, i0=None, i1=None, j0=None, j1=None):
+
+    if mglob is None:
+        msg = "Input argument mglob needs to be specifed for binary data file '%s'." % fpath
+        raise FunException(msg, NameError)
+
+    if nglob is None:
+        msg = "Input argument nglob needs to be specifed for binary data file '%s'." % fpath
+        raise FunException(msg, NameError)
+
+
+    mglob = fv.convert_pos_def_int(mglob, 'mglob')
+    nglob = fv.convert_pos_def_int(nglob, 'nglob')
+
+#    _check_positive_def_int(mglob, 'mglob')
+#    _check_positive_def_int(nglob, 'nglob')
+
+    dtype = _get_binary_dtype(fpath, mglob, nglob)
+    i0, i1, j0, j1 = _check_window(i0, i1, j0, j1, mglob, nglob)
+
+    if is_mmap:
+        # NOTE: Returns a read-only lazy view, only pages touched by
+        #       the strided slice are read from disk
+        data = np.memmap(fpath, dtype, mode='r', shape=(nglob, mglob))
+        return data[j0:j1:stride,i0:i1:stride]
+
+    return _read_binary_window(fpath, dtype, mglob, i0, i1, j0, j1, stride, stride)
 
  
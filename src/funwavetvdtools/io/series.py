@@ -0,0 +1,214 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file series.py
+#
+# @brief Indexed access to time series of FUNWAVE-TVD binary field outputs, e.g., eta_00001
+#
+# @section description_series Description
+# Scans an output directory once, caching the file list and sizes of each output
+# variable, and reads space-time blocks into a single preallocated array. The dtype of
+# a variable is only inferred, and its file sizes only checked, when the variable is
+# accessed, so other outputs, e.g., ASCII outputs, do not prevent indexing.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+import funwavetvdtools.io.field as ff
+from funwavetvdtools.parallel.prefetch import prefetch
+
+import os
+import re
+import numpy as np
+
+
+class SeriesVariable():
+
+    def __init__(self, name, fpaths, numbers, fsizes, mglob, nglob):
+
+        self._name = name
+        self._fpaths = fpaths
+        self._numbers = numbers
+        self._fsizes = fsizes
+        self._mglob = mglob
+        self._nglob = nglob
+        self._dtype = None
+
+    def _get_dtype(self):
+
+        if self._dtype is not None: return self._dtype
+
+        if len(set(self._fsizes)) > 1:
+            msg = "Can not read variable '%s' as output files are not the same size." % self._name
+            raise FunException(msg, ValueError)
+
+        # NOTE: All files have the same size so the dtype only needs to be inferred from 
+        #       the first file
+        self._dtype = ff._get_binary_dtype(self._fpaths[0], self._mglob, self._nglob)
+        return self._dtype
+
+    @property
+    def name(self): return self._name
+
+    @property
+    def fpaths(self): return self._fpaths
+
+    @property
+    def numbers(self): return self._numbers
+
+    @property
+    def dtype(self): return self._get_dtype()
+
+    @property
+    def shape(self): return (len(self._fpaths), self._nglob, self._mglob)
+
+    def __len__(self): return len(self._fpaths)
+
+    @staticmethod
+    def _parse_key(key):
+
+        if type(key) is not tuple: key = (key,)
+
+        if len(key) > 3:
+            msg = "Too many indices for field series, expected at most 3, got %d." % len(key)
+            raise FunException(msg, IndexError)
+
+        return key + (slice(None),)*(3-len(key))
+
+    @staticmethod
+    def _resolve_spatial(key, n, name):
+
+        # Converting integer index to slice of length one to be squeezed after reading
+        if isinstance(key, (int, np.integer)):
+            idx = range(n)[key]
+            return idx, idx+1, 1, True
+
+        if type(key) is not slice:
+            msg = "Invalid index type %s for %s dimension, expected int or slice." % (type(key), name)
+            raise FunException(msg, IndexError)
+
+        s0, s1, step = key.indices(n)
+        if step < 1:
+            msg = "Negative or zero steps are not supported for %s dimension." % name
+            raise FunException(msg, IndexError)
+
+        if s0 >= s1:
+            msg = "Empty slice selected for %s dimension." % name
+            raise FunException(msg, IndexError)
+
+        return s0, s1, step, False
+
+    def _resolve_key(self, key):
+
+        kt, kj, ki = self._parse_key(key)
+
+        nt, nglob, mglob = self.shape
+
+        is_t_scalar = isinstance(kt, (int, np.integer))
+        t_idxs = [range(nt)[kt]] if is_t_scalar else range(nt)[kt]
+
+        j0, j1, sj, is_j_scalar = self._resolve_spatial(kj, nglob, 'y')
+        i0, i1, si, is_i_scalar = self._resolve_spatial(ki, mglob, 'x')
+
+        window = (i0, i1, j0, j1, si, sj)
+        return t_idxs, window, (is_t_scalar, is_j_scalar, is_i_scalar)
+
+    def _read_snapshot(self, t, window, out=None):
+        return ff._read_binary_window(self._fpaths[t], self._get_dtype(), self._mglob, *window, out)
+
+    def __getitem__(self, key):
+
+        t_idxs, window, is_scalars = self._resolve_key(key)
+
+        i0, i1, j0, j1, si, sj = window
+        shape = (len(t_idxs), len(range(j0, j1, sj)), len(range(i0, i1, si)))
+        data = np.empty(shape, self._get_dtype())
+
+        # Reading each snapshot directly into the preallocated space-time array
+        for k, t in enumerate(t_idxs): self._read_snapshot(t, window, data[k])
+
+        squeeze = tuple(ax for ax, is_scalar in enumerate(is_scalars) if is_scalar)
+        return data.squeeze(axis=squeeze) if squeeze else data
+
+    def iter(self, key=slice(None), n_workers=2, depth=4):
+
+        """ Streams snapshots selected by key, e.g., np.s_[t0:t1, j0:j1, i0:i1], reading 
+            the next snapshots ahead on a bounded thread pool
+
+        :param key:       Index of snapshots and window to read. 
+        :type  key:       slice, int, or tuple
+        :param n_workers: Number of reader threads.
+        :type  n_workers: int
+        :param depth:     Maximum number of snapshots read ahead of the consumer.
+        :type  depth:     int
+
+        :rtype: generator
+        """
+
+        t_idxs, window, (_, is_j_scalar, is_i_scalar) = self._resolve_key(key)
+        squeeze = tuple(ax for ax, is_scalar in enumerate([is_j_scalar, is_i_scalar]) if is_scalar)
+
+        for data in prefetch(self._read_snapshot, list(t_idxs), (window,), n_workers, depth):
+            yield data.squeeze(axis=squeeze) if squeeze else data
+
+
+class FieldSeries():
+
+    # FUNWAVE-TVD output files are of the form [name]_[5 digit number], e.g., eta_00001
+    _FNAME_PATTERN = re.compile(r'^([A-Za-z][A-Za-z0-9]*)_(\d{5})$')
+
+    def __init__(self, output_dir, mglob, nglob):
+
+        if not os.path.isdir(output_dir):
+            msg = "Can not index field series as output directory '%s' does not exist." % output_dir
+            raise FunException(msg, ValueError)
+
+        self._output_dir = output_dir
+        self._mglob = fv.convert_pos_def_int(mglob, 'mglob')
+        self._nglob = fv.convert_pos_def_int(nglob, 'nglob')
+
+        self._vars = self._index()
+
+    def _index(self):
+
+        # Grouping files by variable name, sizes are cached from a single directory scan
+        groups = {}
+        with os.scandir(self._output_dir) as it:
+            for entry in it:
+                match = self._FNAME_PATTERN.match(entry.name)
+                if match is None or not entry.is_file(): continue
+
+                name, number = match.group(1), int(match.group(2))
+                groups.setdefault(name, []).append((number, entry.path, entry.stat().st_size))
+
+        variables = {}
+        for name, files in groups.items():
+
+            files.sort()
+            numbers, fpaths, fsizes = zip(*files)
+
+            # NOTE: Dtypes and sizes are checked when a variable is accessed
+            variables[name] = SeriesVariable(name, list(fpaths), list(numbers), list(fsizes), 
+                                             self._mglob, self._nglob)
+
+        return variables
+
+    @property
+    def output_dir(self): return self._output_dir
+
+    @property
+    def names(self): return sorted(self._vars.keys())
+
+    def __contains__(self, name): return name in self._vars
+
+    def __getitem__(self, name):
+
+        if name not in self._vars:
+            msg = "Variable '%s' not found in output directory '%s'." % (name, self._output_dir)
+            raise FunException(msg, KeyError)
+
+        # Checking the requested variable can be read as binary field series
+        var = self._vars[name]
+        var._get_dtype()
+
+        return var
@@ -0,0 +1,44 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file text.py
+#
+# @brief Fast path parser for whitespace separated float tables, e.g., depth and sta_XXXX files
+#
+# @section description_text Description
+# FUNWAVE-TVD text inputs and outputs are plain tables of floats without headers or
+# comments, therefore comment scanning and column inference are skipped when parsing.
+#
+
+from funwavetvdtools.error import FunException
+
+import numpy as np
+
+
+def read_table(fpath, usecols=None, skiprows=0, max_rows=None):
+
+    """ Parses a whitespace separated table of floats in a single pass
+
+    :param fpath:    Path to text file.
+    :type  fpath:    str
+    :param usecols:  Indices of columns to parse, all columns are parsed if None.
+    :type  usecols:  list, range, or None
+    :param skiprows: Number of rows to skip at start of file.
+    :type  skiprows: int
+    :param max_rows: Maximum number of rows to parse after skipped rows, all rows if None.
+    :type  max_rows: int or None
+
+    :rtype: ndarray
+    """
+
+    # NOTE: Since numpy 1.23, loadtxt is implemented in C and benchmarks faster than
+    #       np.fromstring and the pandas C engine for these files. Disabling comment
+    #       handling avoids scanning each line for comment characters.
+    try:
+        data = np.loadtxt(fpath, dtype=np.float64, comments=None, usecols=usecols,
+                          skiprows=skiprows, max_rows=max_rows, ndmin=2)
+    except Exception as e:
+        msg = "Could not parse text file '%s'. See traceback for more details." % fpath
+        raise FunException(msg, e)
+
+    return data
@@ -9,7 +9,8 @@ def iterator(x0, f, df, tolerence=10**-5, max_iterations=10):
         x0 = x0 - cor
         err = np.abs(cor/x0)
 
-        if err < tolerence: return x0
+        # NOTE: For arrays, iterating until all points have converged
+        if np.all(err < tolerence): return x0
 
     # Raises exception if iterative scheme does not reach 
     # error tolerence within max iteration count
@@ -0,0 +1,131 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file quantiles.py
+#
+# @brief Bounded memory streaming quantile estimation
+#
+# @section description_quantiles Description
+# Simplified KLL sketch, values are stored in levels where items in level i represent
+# 2^i values. When a level holds more than k items, it is sorted and every other item
+# is promoted to the next level. Memory is O(k log(n/k)) and the rank error is O(1/k).
+# Quantiles are exact while fewer than k values have been added. Compaction alternates
+# between even and odd offsets instead of random offsets so results are reproducible.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+
+import numpy as np
+
+
+class QuantileSketch():
+
+    def __init__(self, k=1024):
+
+        self._k = fv.convert_pos_def_int(k, 'k')
+        if self._k < 2:
+            msg = "Sketch size k must be at least 2, got %d." % self._k
+            raise FunException(msg, ValueError)
+
+        self._levels = [np.empty(0)]
+        self._n = 0
+        self._parity = 0
+
+    @property
+    def n(self): return self._n
+
+    @property
+    def k(self): return self._k
+
+    @property
+    def is_exact(self): return len(self._levels) == 1
+
+    def _compress(self):
+
+        lvl = 0
+        while lvl < len(self._levels):
+
+            items = self._levels[lvl]
+            if len(items) > self._k:
+
+                items = np.sort(items)
+
+                # Keeping last item at current level if odd number of items
+                n_even = len(items) - len(items) % 2
+                self._levels[lvl] = items[n_even:]
+
+                promoted = items[self._parity:n_even:2]
+                self._parity ^= 1
+
+                if lvl+1 == len(self._levels): self._levels.append(np.empty(0))
+                self._levels[lvl+1] = np.concatenate([self._levels[lvl+1], promoted])
+
+            lvl += 1
+
+    def update(self, values):
+
+        """ Adds values to sketch, NaN values are ignored
+
+        :param values: Values to add.
+        :type  values: ndarray or float
+        """
+
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0: return
+
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._n += len(values)
+        self._compress()
+
+    def merge(self, other):
+
+        """ Merges values of another sketch into sketch
+
+        :param other: Sketch to merge, must have the same size k.
+        :type  other: QuantileSketch
+        """
+
+        fv.check_type(other, QuantileSketch, 'other')
+
+        if other.k != self._k:
+            msg = "Can not merge sketches of different sizes, got k=%d and k=%d." % (self._k, other.k)
+            raise FunException(msg, ValueError)
+
+        while len(self._levels) < len(other._levels): self._levels.append(np.empty(0))
+        for lvl, items in enumerate(other._levels):
+            self._levels[lvl] = np.concatenate([self._levels[lvl], items])
+
+        self._n += other.n
+        self._compress()
+
+    def quantile(self, q):
+
+        """ Estimates quantiles of values added to sketch
+
+        :param q: Quantiles in range [0, 1].
+        :type  q: float or ndarray
+
+        :rtype: float or ndarray
+        """
+
+        if self._n == 0:
+            msg = "Can not compute quantile of empty sketch."
+            raise FunException(msg, ValueError)
+
+        if self.is_exact: return np.quantile(self._levels[0], q)
+
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2.0**lvl) for lvl, items in enumerate(self._levels)])
+
+        idx = np.argsort(values)
+        values = values[idx]
+        cum_weights = np.cumsum(weights[idx])
+
+        # Interpolating between mid-points of weighted ranks, analogous to np.quantile
+        ranks = (cum_weights - 0.5*weights[idx])/cum_weights[-1]
+        return np.interp(q, ranks, values)
+
+    def percentile(self, p):
+        return self.quantile(np.asarray(p)/100)
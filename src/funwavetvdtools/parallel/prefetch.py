@@ -0,0 +1,67 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file prefetch.py
+#
+# @brief Streaming iterator for overlapping I/O bound jobs with computation
+#
+# @section description_prefetchfile Description
+# Jobs are submitted ahead of the consumer to a thread pool with a bounded queue,
+# so at most depth results are held in memory at any time.
+#
+# @section libraries_main Libraries/Modules
+# - concurrent.futures standard library (https://docs.python.org/3/library/concurrent.futures.html)
+#   - Access to ThreadPoolExecutor
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+from funwavetvdtools.parallel.simple import _zip_args
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+
+
+def prefetch(func, args_list, common_args=None, n_workers=2, depth=4):
+
+    """ Generator executing jobs ahead of the consumer on a thread pool, results are yielded
+        in the same order as args_list
+
+    :param func:        Function to be executed, should release the GIL, e.g., file I/O, for speedup.
+    :type  func:        function
+    :param args_list:   List of objects (for jobs with only one varying arguments) or list
+                        of tuples (for jobs with more than one varying arguments).
+    :type  args_list:   list
+    :param common_args: Arguments common to all jobs. Either a tuple or single object.
+    :type  common_args: None, Object, Tuple
+    :param n_workers:   Number of threads in pool.
+    :type  n_workers:   int
+    :param depth:       Maximum number of jobs submitted ahead of the consumer.
+    :type  depth:       int
+
+    :rtype: generator
+    """
+
+    n_workers = fv.convert_pos_def_int(n_workers, 'n_workers')
+    depth = fv.convert_pos_def_int(depth, 'depth')
+
+    if depth < n_workers:
+        msg = "Prefetch depth, %d, must be greater or equal to the number of workers, %d." % (depth, n_workers)
+        raise FunException(msg, ValueError)
+
+    args_iter = iter(_zip_args(args_list, common_args))
+
+    with ThreadPoolExecutor(n_workers) as pool:
+
+        queue = deque(pool.submit(func, *args) for args in islice(args_iter, depth))
+
+        try:
+            while queue:
+                result = queue.popleft().result()
+                # Refilling queue before handing result to consumer to keep workers busy
+                for args in islice(args_iter, 1): queue.append(pool.submit(func, *args))
+                yield result
+        finally:
+            # Cancelling pending jobs if consumer stops early
+            for job in queue: job.cancel()
@@ -0,0 +1,89 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file shared.py
+#
+# @brief NumPy arrays backed by shared memory for parallel jobs
+#
+# @section description_sharedfile Description
+# A SharedArray is pickled as the name, shape and dtype of its shared memory block, so
+# passing one to a parallel job, e.g., parallel.simple, does not serialize the data.
+# Jobs attach to the block and read or write the array in place. The process creating
+# the array owns the block and must unlink it, e.g., with a with statement.
+#
+# @section libraries_main Libraries/Modules
+# - multiprocessing standard library (https://docs.python.org/3/library/multiprocessing.shared_memory.html)
+#   - Access to SharedMemory
+#
+
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class SharedArray():
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+
+        self._shape = tuple(shape)
+        self._dtype = np.dtype(dtype)
+        self._is_owner = name is None
+
+        if self._is_owner:
+            # NOTE: Shared memory blocks can not be empty
+            size = max(int(np.prod(self._shape))*self._dtype.itemsize, 1)
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+
+        self._array = np.ndarray(self._shape, dtype=self._dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def from_array(cls, arr):
+
+        """ Creates shared array with a copy of an array
+
+        :param arr: Array to copy.
+        :type  arr: ndarray
+
+        :rtype: SharedArray
+        """
+
+        arr = np.asarray(arr)
+        shared = cls(arr.shape, arr.dtype)
+        shared.array[...] = arr
+        return shared
+
+    @property
+    def array(self): return self._array
+
+    @property
+    def name(self): return self._shm.name
+
+    @property
+    def shape(self): return self._shape
+
+    @property
+    def dtype(self): return self._dtype
+
+    @property
+    def is_owner(self): return self._is_owner
+
+    # Pickling only the reference to the shared memory block
+    def __getstate__(self):
+        return {'name': self._shm.name, 'shape': self._shape, 'dtype': self._dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(state['shape'], state['dtype'], state['name'])
+
+    def close(self):
+        # Releasing array before closing, buffer can not be closed while exported
+        self._array = None
+        self._shm.close()
+
+    def unlink(self):
+        self.close()
+        if self._is_owner: self._shm.unlink()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *args): self.unlink()
@@ -20,6 +20,18 @@
 
 from multiprocessing import Pool
 from tqdm import tqdm
+import os
+
+def cpu_count():
+
+    """ Number of processors available to the current process, i.e., respecting CPU affinity
+        masks set by, e.g., taskset or batch schedulers, where supported
+
+    :rtype: int
+    """
+
+    if hasattr(os, 'sched_getaffinity'): return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
 
 def _simple(func, n_procs, args_list, p_bar=None ):
 
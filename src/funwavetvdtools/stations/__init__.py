@@ -1,3 +1,4 @@
 
 from .profile import Profile 
 from .stations import Station, Stations
+from .archive import Archive
@@ -0,0 +1,207 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file archive.py
+#
+# @brief Consolidated archive of all station time series, i.e., sta_XXXX files
+#
+# @section description_archive Description
+# An archive is a directory containing a raw little-endian double-precision data file,
+# data.bin, and a JSON index, index.json. If all stations have the same length, the
+# data is stored variable-major as a (4, n_stations, n) block of the t, eta, u, and v
+# series, so each variable of all stations is a contiguous (n_stations, n) view.
+# Otherwise, stations are stored back to back, each as a contiguous (4, n) block. In
+# both layouts every series is a contiguous view of a single memory-mapped file,
+# see the 'layout' entry of the index. The index is written last and
+# marks the archive as complete. Both files are written to temporary files and renamed
+# into place, so rewriting an archive never truncates a file that is memory-mapped by
+# open archives.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+from funwavetvdtools.io.cache import _write_atomic
+
+import os
+import json
+import numpy as np
+
+VERSION = 2
+COLUMNS = ['t', 'eta', 'u', 'v']
+DTYPE = '<f8'
+
+DATA_FNAME = 'data.bin'
+INDEX_FNAME = 'index.json'
+
+# Data layouts, version 1 archives are always station-major
+STATION_LAYOUT = 'station'
+VARIABLE_LAYOUT = 'variable'
+
+
+class Archive():
+
+    def __init__(self, path):
+
+        fpath = os.path.join(path, INDEX_FNAME)
+        fv.check_fpath(fpath, 'index')
+
+        with open(fpath, 'r') as fh: index = json.load(fh)
+
+        if index['version'] not in [1, VERSION]:
+            msg = "Unsupported station archive version %d, expected at most %d." % (index['version'], VERSION)
+            raise FunException(msg, ValueError)
+
+        if index['dtype'] != DTYPE:
+            msg = "Unsupported station archive dtype '%s', expected '%s'." % (index['dtype'], DTYPE)
+            raise FunException(msg, ValueError)
+
+        self._path = path
+        self._layout = index.get('layout', STATION_LAYOUT)
+        self._numbers = index['numbers']
+        self._lengths = np.array(index['lengths'], dtype=int)
+        self._offsets = np.concatenate([[0], np.cumsum(self._lengths)])*len(COLUMNS)
+        self._lookup = {n: k for k, n in enumerate(self._numbers)}
+
+        fpath = os.path.join(path, DATA_FNAME)
+        n_items = int(self._offsets[-1])
+        self._data = np.memmap(fpath, DTYPE, mode='r', shape=(n_items,)) if n_items > 0 else np.empty(0, DTYPE)
+
+    @property
+    def path(self): return self._path
+
+    @property
+    def layout(self): return self._layout
+
+    @property
+    def numbers(self): return self._numbers
+
+    @property
+    def lengths(self): return self._lengths
+
+    @property
+    def n_stations(self): return len(self._numbers)
+
+    @property
+    def is_uniform(self): return len(set(self._lengths)) <= 1
+
+    def __contains__(self, number): return number in self._lookup
+
+    def get(self, number):
+
+        """ Gets t, eta, u, and v series of station as views of the memory-mapped archive
+
+        :param number: Station number.
+        :type  number: int
+
+        :rtype: ndarray of shape (4, n)
+        """
+
+        if number not in self._lookup:
+            msg = "Station %d not found in archive '%s'." % (number, self._path)
+            raise FunException(msg, KeyError)
+
+        k = self._lookup[number]
+        if self._layout == VARIABLE_LAYOUT: return self._stack()[:, k, :]
+
+        i0, i1 = self._offsets[k], self._offsets[k+1]
+        return self._data[i0:i1].reshape([len(COLUMNS), self._lengths[k]])
+
+    def stack(self):
+
+        """ Gets series of all stations stacked per variable as a zero-copy view of the 
+            memory-mapped archive, requires all stations to have the same length. For the 
+            variable layout, each (n_stations, n) variable block is contiguous. For the
+            station layout, e.g., version 1 archives, only each series is contiguous and
+            rows of a variable block are 4*n items apart.
+
+        :rtype: ndarray of shape (4, n_stations, n)
+        """
+
+        if not self.is_uniform:
+            msg = "Can not stack stations in archive '%s' as series lengths are not the same." % self._path
+            raise FunException(msg, ValueError)
+
+        return self._stack()
+
+    def _stack(self):
+
+        n = self._lengths[0] if self.n_stations > 0 else 0
+        if self._layout == VARIABLE_LAYOUT: return self._data.reshape([len(COLUMNS), self.n_stations, n])
+
+        data = self._data.reshape([self.n_stations, len(COLUMNS), n])
+        return data.transpose(1, 0, 2)
+
+
+class _NotUniform(Exception): pass
+
+
+def write(path, stations):
+
+    """ Packs the series of all stations into an archive
+
+    :param path:     Path to archive directory, created if it does not exist.
+    :type  path:     str
+    :param stations: Stations to pack.
+    :type  stations: Stations
+
+    :rtype: Archive
+    """
+
+    # Hack to avoid circular imports
+    from funwavetvdtools.stations.stations import _load_station_file
+
+    os.makedirs(path, exist_ok=True)
+
+    # Removing index first so an interrupted write is never read as complete
+    index_fpath = os.path.join(path, INDEX_FNAME)
+    if os.path.exists(index_fpath): os.remove(index_fpath)
+
+    def get_data(sta):
+        # Parsing unloaded stations without keeping data in memory
+        if sta._is_data_loaded: return np.vstack([sta.t, sta.eta, sta.u, sta.v])
+        return _load_station_file(sta._fpath, sta._is_cache, sta._cache_dir)
+
+    def write_station_layout(fh):
+        for sta in stations.list:
+            data = get_data(sta)
+            np.ascontiguousarray(data, dtype=DTYPE).tofile(fh)
+            numbers.append(int(sta.number))
+            lengths.append(int(data.shape[1]))
+
+    def write_variable_layout(fh):
+        ns = len(stations.list)
+        itemsize = np.dtype(DTYPE).itemsize
+        for k, sta in enumerate(stations.list):
+            data = np.ascontiguousarray(get_data(sta), dtype=DTYPE)
+            n = data.shape[1]
+
+            if k > 0 and n != lengths[0]: raise _NotUniform()
+
+            # Writing each series at its place in the (4, n_stations, n) block
+            for c in range(len(COLUMNS)):
+                fh.seek((c*ns + k)*n*itemsize)
+                fh.write(data[c].tobytes())
+
+            numbers.append(int(sta.number))
+            lengths.append(int(n))
+
+    # NOTE: Replacing files instead of writing in place, existing files may be memory-mapped,
+    #       e.g., rewriting the archive stations were loaded from
+    data_fpath = os.path.abspath(os.path.join(path, DATA_FNAME))
+
+    # Writing variable layout unless a station has a different length, lengths of unloaded
+    # stations are only known after parsing
+    layout = VARIABLE_LAYOUT
+    numbers, lengths = [], []
+    try:
+        _write_atomic(data_fpath, write_variable_layout)
+    except _NotUniform:
+        layout = STATION_LAYOUT
+        numbers, lengths = [], []
+        _write_atomic(data_fpath, write_station_layout)
+
+    index = {'version': VERSION, 'dtype': DTYPE, 'columns': COLUMNS, 'layout': layout,
+             'numbers': numbers, 'lengths': lengths}
+    _write_atomic(os.path.abspath(index_fpath), lambda fh: fh.write(json.dumps(index).encode()))
+
+    return Archive(path)
@@ -7,6 +7,7 @@ import funwavetvdtools.stations.overtopping as ot
 from funwavetvdtools.stations.stations import Stations
 
 import numpy as np
+import copy
 from shapely import Polygon, LineString
 
 class Profile(Stations):
@@ -39,6 +40,9 @@ class Profile(Stations):
 
         self._s = s
         self._list = self._raw._list
+        self._block = None
+        self._is_cache = self._raw._is_cache
+        self._cache_dir = self._raw._cache_dir
  
     def _check_profile_best(self):
         raise NotImplementedError
@@ -58,6 +62,7 @@ class Profile(Stations):
 
         self._raw = copy.copy(stations)
         self._raw._list = [ stations.list[n-1] for n in numbers]
+        self._raw._block = None
 
         if mode == 'stations':
             self._check_profile_stations()
@@ -74,10 +79,7 @@ class Profile(Stations):
 
         x = self._s
         h = self.h
-        nt = self.list[0].n
-        ns = len(self.list)
-        eta = np.zeros([ns, nt])
-        for i in range(ns): eta[i,:] = self.list[i].eta
+        eta = self.eta
 
         return x, h, eta 
 
@@ -138,7 +140,7 @@ def generate_stations(x, y, x1, x2, y1, y2):
     sw_idxs = [rect.sw_vertex for rect in rects]
 
     # Removing duplicate station indices 
-    sta_idxs = np.unique(np.concatenate([rect.vertices for rect in rects))
+    sta_idxs = np.unique(np.concatenate([rect.vertices for rect in rects]))
 
     return sta_idxs, sw_idxs
 
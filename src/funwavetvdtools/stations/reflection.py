@@ -12,8 +12,10 @@
 from funwavetvdtools.error import FunException
 import funwavetvdtools.validation as fv
 from funwavetvdtools.waves.dispersion import full as wn
+from funwavetvdtools.parallel.simple import simple as parallel_simple
 
 import numpy as np
+from scipy.integrate import trapezoid
 
 
 
@@ -76,7 +78,7 @@ def compute(eta1, eta2, dl, dt, h, f_min=0.05, f_max=0.45):
     B2 = np.imag(ETA2[0:nhalf])
 
     w = (2*np.pi/dt/n)*np.arange(1, nhalf+1)
-    k = np.array([wn(w=wi, h=h)['k'] for wi in w])
+    k = wn(w=w, h=h).k
 
 
     # amplitude calculation
@@ -124,8 +126,119 @@ def compute(eta1, eta2, dl, dt, h, f_min=0.05, f_max=0.45):
     return f, a_i, a_r, e_i, e_r, K_r
 
 
+def compute_multi(eta, x, dt, h, f_min=0.05, f_max=0.45, tolerence=1e-2):
+
+    """ Separates incident and reflected waves from N >= 2 gauges with the least-squares 
+        method of Mansard and Funke (1980). At each frequency, the gauge Fourier 
+        coefficients B_p are fit to Z_I exp(-i k x_p) + Z_R exp(+i k x_p) by solving the 
+        2x2 normal equations, with all frequencies solved in a single batched solve.
+
+    :param eta:       Time series of gauges stacked as rows.
+    :type  eta:       ndarray of shape (ng, n)
+    :param x:         Positions of gauges along direction of propagation.
+    :type  x:         ndarray of shape (ng,)
+    :param dt:        Time step of series.
+    :type  dt:        float
+    :param h:         Water depth.
+    :type  h:         float
+    :param f_min:     Minimum resolvable frequency.
+    :type  f_min:     float
+    :param f_max:     Maximum resolvable frequency.
+    :type  f_max:     float
+    :param tolerence: Frequencies where the determinant of the normal equations relative to
+                      ng^2 is below tolerence are singular, e.g., gauge spacings near
+                      multiples of half a wavelength, and are set to NaN.
+    :type  tolerence: float
+
+    :rtype: tuple of f, a_i, a_r, e_i, e_r, and K_r as in compute
+    """
+
+    eta = np.atleast_2d(np.asarray(eta, dtype=float))
+    x = np.asarray(x, dtype=float).ravel()
+
+    ng, n = eta.shape
+    if ng < 2:
+        msg = "At least 2 gauges are required, got %d." % ng
+        raise FunException(msg, ValueError)
+
+    if not len(x) == ng:
+        msg = "The number of gauge positions, %d, must match the number of gauges, %d." % (len(x), ng)
+        raise FunException(msg, ValueError)
+
+    # Frequency limits, same as compute
+    i_min = max(int(np.ceil(f_min * n * dt)), 1)
+    i_max = min(int(f_max * n * dt), n//2)
+
+    # Fourier coefficients normalized as amplitudes
+    B = np.fft.rfft(eta, axis=1)[:, i_min:i_max] * (2/n)
+
+    f = np.arange(i_min, i_max)/(n*dt)
+    k = wn(w=2*np.pi*f, h=h).k
+
+    # Design matrix columns exp(-ikx) and exp(+ikx) relative to first gauge
+    E = np.exp(1j*np.outer(k, x - x[0]))
+
+    # Normal equations [[ng, S], [conj(S), ng]] [Z_I, Z_R] = [sum(E B), sum(conj(E) B)]
+    S = np.sum(E**2, axis=1)
+    M = np.empty([len(f), 2, 2], dtype=complex)
+    M[:, 0, 0] = ng
+    M[:, 0, 1] = S
+    M[:, 1, 0] = np.conj(S)
+    M[:, 1, 1] = ng
+
+    rhs = np.stack([np.sum(E*B.T, axis=1), np.sum(np.conj(E)*B.T, axis=1)], axis=1)
+
+    det = ng**2 - np.abs(S)**2
+    is_valid = det > tolerence*ng**2
+
+    Z = np.full([len(f), 2], np.nan, dtype=complex)
+    if np.any(is_valid): Z[is_valid] = np.linalg.solve(M[is_valid], rhs[is_valid, :, None])[..., 0]
+
+    a_i = np.abs(Z[:, 0])
+    a_r = np.abs(Z[:, 1])
 
+    # Energy of non-singular frequencies
+    e_i = trapezoid(np.square(a_i[is_valid]), f[is_valid])
+    e_r = trapezoid(np.square(a_r[is_valid]), f[is_valid])
 
+    K_r = np.sqrt(e_r / e_i)
+
+    return f, a_i, a_r, e_i, e_r, K_r
+
+
+def compute_multi_batch(etas, xs, dt, h, f_min=0.05, f_max=0.45, tolerence=1e-2, n_procs=1, is_p_bar=False):
+
+    """ Computes least-squares reflection analysis for many gauge arrays, see compute_multi
+
+    :param etas:     Time series of each gauge array, the number of gauges and length of
+                     series may differ between arrays.
+    :type  etas:     list of ndarray of shape (ng, n)
+    :param xs:       Positions of gauges of each array.
+    :type  xs:       list of ndarray of shape (ng,)
+    :param dt:       Time step of series.
+    :type  dt:       float
+    :param h:        Water depth, either common to all arrays or one per array.
+    :type  h:        float or list
+    :param n_procs:  Number of processes to run in parallel. Setting to 1 runs in serial mode.
+    :type  n_procs:  int
+    :param is_p_bar: Flag for turning on tqdm progress bar.
+    :type  is_p_bar: bool
+
+    :rtype: tuple of f list, a_i list, a_r list, e_i ndarray, e_r ndarray, and K_r ndarray
+    """
+
+    n_procs = fv.convert_pos_def_int(n_procs, 'n_procs')
+
+    if not len(etas) == len(xs):
+        msg = "The number of gauge arrays, %d, and positions, %d, are not the same." % (len(etas), len(xs))
+        raise FunException(msg, ValueError)
 
+    hs = np.broadcast_to(np.asarray(h, dtype=float), [len(etas)])
 
+    args_list = [(eta, x, dt, float(h)) for eta, x, h in zip(etas, xs, hs)]
+    common_args = (f_min, f_max, tolerence)
+    results = parallel_simple(compute_multi, n_procs, args_list, common_args, 
+                              p_desc='Gauge arrays', is_p_bar=is_p_bar)
 
+    f, a_i, a_r, e_i, e_r, K_r = zip(*results) if len(results) > 0 else ([], [], [], [], [], [])
+    return list(f), list(a_i), list(a_r), np.array(e_i), np.array(e_r), np.array(K_r)
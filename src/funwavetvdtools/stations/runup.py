@@ -11,6 +11,8 @@
 
 from funwavetvdtools.error import FunException
 import funwavetvdtools.validation as fv
+from funwavetvdtools.parallel.simple import simple as parallel_simple
+from funwavetvdtools.math.quantiles import QuantileSketch
 
 import numpy as np
 from scipy.signal import find_peaks
@@ -18,6 +20,12 @@ from scipy.signal import find_peaks
 
 #class Runup():
 
+# NOTE: Runup depth threshold used by _compute_single regardless of r_depth argument
+_R_DEPTH = 0.002
+
+# Number of time steps processed at once in vectorized runup computations
+_BLOCK_SIZE = 2**16
+
 
 def _all_same(arr):
     arr = fv.convert_array(arr, 'arr')
@@ -46,7 +54,7 @@ def _compute_single(x, h, eta, r_depth=None):
     w_depth = eta + h    
 
 
-    r_depth = 0.002
+    r_depth = _R_DEPTH
     if m < 0: # slopes up
         idx = np.argmax(w_depth>=r_depth)
         if idx == 0: return eta[0], x[0], r_depth  
@@ -65,6 +73,61 @@ def _compute_single(x, h, eta, r_depth=None):
 
     return runup, runup_x, r_depth 
 
+def _compute_slopes(x, h):
+
+    # Least-squares slope of -h against x, equivalent to np.polyfit(x, -h, 1)[0] for each column
+    xm = x - x.mean()
+    return -(xm @ h)/(xm @ xm)
+
+
+def _compute_block(x, h, eta):
+
+    """ Vectorized runup over all time steps (columns) of eta
+
+    :param x:   Cross-shore locations of points.
+    :type  x:   ndarray of shape (npts,)
+    :param h:   Depth at points, either fixed or for each time step.
+    :type  h:   ndarray of shape (npts,) or (npts, nt)
+    :param eta: Surface elevation at points for each time step.
+    :type  eta: ndarray of shape (npts, nt)
+
+    :rtype: tuple of ndarrays of shape (nt,)
+    """
+
+    r_depth = _R_DEPTH
+
+    _, nt = eta.shape
+    cols = np.arange(nt)
+
+    # Slope is computed once for fixed bathymetry instead of every time step 
+    m = _compute_slopes(x, h)
+    is_up = np.broadcast_to(m < 0, (nt,))
+
+    w_depth = eta + (h if h.ndim == 2 else h[:,None])
+    is_wet = w_depth >= r_depth
+
+    # Index of first wet point for up slopes and first dry point for down slopes
+    idx = np.where(is_up, np.argmax(is_wet, axis=0), np.argmin(is_wet, axis=0))
+    idx0 = np.maximum(idx-1, 0)
+
+    # Linear interpolation between the points bounding the wet/dry crossing 
+    w0, w1 = w_depth[idx0,cols], w_depth[idx,cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = (r_depth - w0)/(w1 - w0)
+    s[~np.isfinite(s)] = 0
+
+    e0 = eta[idx0,cols]
+    runup = e0 + s*(eta[idx,cols] - e0)
+    runup_x = x[idx0] + s*(x[idx] - x[idx0])
+
+    # No wet/dry crossing found, defaulting to first point as in _compute_single 
+    is_edge = idx == 0
+    runup[is_edge] = eta[0,is_edge]
+    runup_x[is_edge] = x[0]
+
+    return runup, runup_x
+
+
 def _compute_timeseries(x, h, eta, r_depth=None):
 
     nx = len(x)
@@ -97,17 +160,17 @@ def _compute_timeseries(x, h, eta, r_depth=None):
         raise FunException(msg, TypeError)
  
 
-    # NOTE: Fix r_depth name collision 
-    runup   = np.zeros(nt)
-    runup_x = np.zeros(nt)
-    r_depth2 = np.zeros(nt)
+    runup   = np.empty(nt)
+    runup_x = np.empty(nt)
 
-    if ndh == 2:
-        for i in range(nt):
-            runup[i], runup_x[i], r_depth2[i] = _compute_single(x, h[:,i], eta[:,i], r_depth)
-    else:
-        for i in range(nt):
-            runup[i], runup_x[i], r_depth2[i] = _compute_single(x, h, eta[:,i], r_depth)
+    # Processing time steps in blocks to bound memory of temporary arrays
+    for i0 in range(0, nt, _BLOCK_SIZE):
+        i1 = min(i0 + _BLOCK_SIZE, nt)
+        h_blk = h[:,i0:i1] if ndh == 2 else h
+        runup[i0:i1], runup_x[i0:i1] = _compute_block(x, h_blk, eta[:,i0:i1])
+
+    # NOTE: Fix r_depth name collision, see _compute_single for fixed value
+    r_depth2 = np.full(nt, _R_DEPTH)
 
     return runup, runup_x, r_depth2
 
@@ -184,6 +247,165 @@ def compute_with_stats(x, h, eta, r_depth=None, \
         raise FunException(msg, TypeError)
 
 
+def _compute_batch_job(x, h, eta, upper_centile, peak_width):
+    runup, runup_x, _, r_percent, setup = compute_with_stats(x, h, eta, upper_centile=upper_centile, 
+                                                             peak_width=peak_width)
+    return runup, runup_x, r_percent, setup
+
+
+def compute_batch(profiles, n_procs=1, upper_centile=2, peak_width=2, is_p_bar=False):
+
+    """ Computes runup time series and statistics for many cross-shore profiles
+
+    :param profiles:      Profiles as either Profile objects or (x, h, eta) tuples. The number of points
+                          and time steps may differ between profiles.
+    :type  profiles:      list
+    :param n_procs:       Number of processes to run in parallel. Setting to 1 runs in serial mode.
+    :type  n_procs:       int
+    :param upper_centile: Upper centile of runup peaks, e.g., 2 for R2%.
+    :type  upper_centile: float
+    :param peak_width:    Minimum width of runup peaks in time steps.
+    :type  peak_width:    float
+    :param is_p_bar:      Flag for turning on tqdm progress bar.
+    :type  is_p_bar:      bool
+
+    :rtype: tuple of runup list, runup location list, runup centile ndarray, and setup ndarray
+    """
+
+    n_procs = fv.convert_pos_def_int(n_procs, 'n_procs')
+
+    # NOTE: Unwrapping Profile objects since only arrays are passed to parallel jobs
+    args_list = [p._prep_runup_input() if hasattr(p, '_prep_runup_input') else tuple(p) for p in profiles]
+
+    common_args = (upper_centile, peak_width)
+    results = parallel_simple(_compute_batch_job, n_procs, args_list, common_args, 
+                              p_desc='Profiles', is_p_bar=is_p_bar)
+
+    runup, runup_x, r_percent, setup = zip(*results) if len(results) > 0 else ([], [], [], [])
+    return list(runup), list(runup_x), np.array(r_percent), np.array(setup)
+
+
+class RunupAccumulator():
+
+    """ Incremental runup statistics over eta chunks for fixed bathymetry. In exact mode, 
+        the runup series (one value per time step) is kept and statistics match 
+        compute_with_stats. Otherwise, peaks are tracked across chunk boundaries with an 
+        overlap buffer and the runup centile is estimated with a bounded memory sketch. 
+
+    :param x:             Cross-shore locations of points.
+    :type  x:             ndarray
+    :param h:             Depth at points.
+    :type  h:             ndarray
+    :param upper_centile: Upper centile of runup peaks, e.g., 2 for R2%.
+    :type  upper_centile: float
+    :param peak_width:    Minimum width of runup peaks in time steps.
+    :type  peak_width:    float
+    :param is_exact:      Flag for exact mode.
+    :type  is_exact:      bool
+    :param overlap:       Number of time steps buffered between chunks, also used as the window
+                          length for peak prominence in approximate mode.
+    :type  overlap:       int
+    :param sketch_size:   Size of quantile sketch, see math.quantiles.QuantileSketch.
+    :type  sketch_size:   int
+    """
+
+    def __init__(self, x, h, upper_centile=2, peak_width=2, is_exact=False, overlap=256, sketch_size=1024):
+
+        x, h, _, _, _ = _check_args(x, h, np.zeros(1))
+
+        if h.ndim != 1 or len(h) != len(x):
+            msg = "Input array 'h' must be 1 dimensional and the same length as 'x'."
+            raise FunException(msg, TypeError)
+
+        self._x = x
+        self._h = h
+        self._upper_centile = upper_centile
+        self._peak_width = peak_width
+        self._is_exact = is_exact
+        self._overlap = fv.convert_pos_def_int(overlap, 'overlap')
+
+        self._n = 0
+        self._sum = 0.0
+        self._is_final = False
+
+        # Exact mode state
+        self._series = []
+
+        # Approximate mode state
+        self._sketch = QuantileSketch(sketch_size)
+        self._tail = np.empty(0)
+        self._tail_start = 0
+        self._last_peak = -1
+
+    @property
+    def n(self): return self._n
+
+    @property
+    def setup(self): return self._sum/self._n if self._n > 0 else np.nan
+
+    def _add_peaks(self, runup, is_final):
+
+        seg = np.concatenate([self._tail, runup])
+
+        peak_idxs, _ = find_peaks(seg, width=self._peak_width, wlen=self._overlap)
+
+        # Peaks within half a window of the end may change with the next chunk
+        limit = len(seg) if is_final else len(seg) - self._overlap//2
+        is_new = (peak_idxs + self._tail_start > self._last_peak) & (peak_idxs < limit)
+        peak_idxs = peak_idxs[is_new]
+
+        if len(peak_idxs) > 0:
+            self._sketch.update(seg[peak_idxs])
+            self._last_peak = peak_idxs[-1] + self._tail_start
+
+        n_keep = min(len(seg), self._overlap)
+        self._tail = seg[len(seg)-n_keep:]
+        self._tail_start += len(seg) - n_keep
+
+    def update(self, eta):
+
+        """ Computes runup of eta chunk and updates statistics
+
+        :param eta: Surface elevation at points for consecutive time steps.
+        :type  eta: ndarray of shape (npts, nt)
+
+        :rtype: tuple of runup and runup location ndarrays of chunk
+        """
+
+        if self._is_final:
+            msg = "Can not update runup accumulator after it has been finalized."
+            raise FunException(msg, RuntimeError)
+
+        runup, runup_x, _ = _compute_timeseries(self._x, self._h, eta)
+
+        self._n += len(runup)
+        self._sum += np.sum(runup)
+
+        if self._is_exact:
+            self._series.append(runup)
+        else:
+            self._add_peaks(runup, False)
+
+        return runup, runup_x
+
+    def finalize(self):
+
+        """ Processes remaining buffered time steps and computes statistics
+
+        :rtype: tuple of runup centile and setup
+        """
+
+        if not self._is_final:
+            if not self._is_exact: self._add_peaks(np.empty(0), True)
+            self._is_final = True
+
+        if self._is_exact:
+            runup = np.concatenate(self._series) if self._series else np.empty(0)
+            r_percent = compute_stats(runup, self._upper_centile, self._peak_width)
+        else:
+            r_percent = self._sketch.percentile(100-self._upper_centile) if self._sketch.n > 0 else 0
+
+        return r_percent, self.setup
 
 
 if __name__ == "__main__":
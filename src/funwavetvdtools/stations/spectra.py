@@ -0,0 +1,204 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file spectra.py
+#
+# @brief One-sided power spectral densities and spectral wave parameters of station series
+#
+# @section description_spectra Description
+# Series of all stations are processed at once as rows of a 2-D array with a batched
+# real FFT. Series are optionally split into overlapping segments (Welch's method) that
+# are detrended, windowed and averaged. Rows are processed in batches to bound the
+# memory of segment copies, so memory-mapped inputs, e.g., station archives, are read
+# one batch at a time.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import detrend as sp_detrend, get_window
+from scipy.integrate import trapezoid
+
+
+def _check_detrend(detrend):
+    if detrend not in ['linear', 'constant', None]:
+        msg = "Invalid detrend type '%s', must be 'linear', 'constant' or None." % detrend
+        raise FunException(msg, ValueError)
+
+
+def _check_dt(dt):
+    dt = float(fv.convert_number(dt, 'dt'))
+    if dt <= 0:
+        msg = "Time step must be positive, got %f." % dt
+        raise FunException(msg, ValueError)
+    return dt
+
+
+def _check_segment(n, n_seg, overlap):
+
+    if n_seg is None: n_seg = n
+    n_seg = fv.convert_pos_def_int(n_seg, 'n_seg')
+
+    if n_seg > n:
+        msg = "Segment length, %d, is larger than the length of the series, %d." % (n_seg, n)
+        raise FunException(msg, ValueError)
+
+    if not 0 <= overlap < 1:
+        msg = "Segment overlap must be in range [0, 1), got %f." % overlap
+        raise FunException(msg, ValueError)
+
+    step = max(n_seg - int(overlap*n_seg), 1)
+
+    return n_seg, step
+
+
+def _segment_psd(segs, fs, win, detrend):
+
+    # One-sided PSD of each segment along last axis
+    n_seg = segs.shape[-1]
+
+    if detrend: segs = sp_detrend(segs, axis=-1, type=detrend)
+
+    spec = np.fft.rfft(segs*win, axis=-1)
+    psd = np.abs(spec)**2 / (fs*np.sum(win**2))
+
+    # DC and Nyquist (even lengths) components are not doubled
+    psd[..., 1:] *= 2
+    if n_seg % 2 == 0: psd[..., -1] /= 2
+
+    return psd
+
+
+def _psd_batch(eta, fs, n_seg, step, win, detrend):
+
+    # Segments as zero-copy strided views, shape (b, n_segs, n_seg)
+    segs = sliding_window_view(eta, n_seg, axis=-1)[:, ::step, :]
+    return np.mean(_segment_psd(segs, fs, win, detrend), axis=1)
+
+
+def psd(eta, dt, n_seg=None, overlap=0.5, window='hann', detrend='linear', batch_size=256):
+
+    """ Computes one-sided power spectral densities of many series
+
+    :param eta:        Series stacked as rows, e.g., Stations.eta.
+    :type  eta:        ndarray of shape (ns, n) or (n,)
+    :param dt:         Time step of series.
+    :type  dt:         float
+    :param n_seg:      Length of Welch segments, the whole series is one segment if None.
+    :type  n_seg:      int or None
+    :param overlap:    Fraction of overlap between consecutive segments.
+    :type  overlap:    float
+    :param window:     Window applied to segments, see scipy.signal.get_window.
+    :type  window:     str or tuple
+    :param detrend:    Detrending of segments, 'linear', 'constant' or None.
+    :type  detrend:    str or None
+    :param batch_size: Number of series processed at once.
+    :type  batch_size: int
+
+    :rtype: tuple of frequencies ndarray of shape (nf,) and PSD ndarray of shape (ns, nf) or (nf,)
+    """
+
+    is_1d = np.ndim(eta) == 1
+    eta = np.atleast_2d(eta)
+
+    if eta.ndim != 2:
+        msg = "Series must be a 1-D or 2-D array, got %d dimensions." % eta.ndim
+        raise FunException(msg, ValueError)
+
+    _check_detrend(detrend)
+    dt = _check_dt(dt)
+    batch_size = fv.convert_pos_def_int(batch_size, 'batch_size')
+
+    ns, n = eta.shape
+    n_seg, step = _check_segment(n, n_seg, overlap)
+
+    fs = 1/dt
+    f = np.fft.rfftfreq(n_seg, dt)
+    win = get_window(window, n_seg)
+
+    S = np.empty([ns, len(f)])
+    for i0 in range(0, ns, batch_size):
+        i1 = min(i0 + batch_size, ns)
+        S[i0:i1] = _psd_batch(np.asarray(eta[i0:i1], dtype=float), fs, n_seg, step, win, detrend)
+
+    return f, S[0] if is_1d else S
+
+
+def moment(f, S, order, f_min=None, f_max=None):
+
+    """ Computes spectral moments, m_n = int f^n S(f) df, over a frequency range
+
+    :param f:     Frequencies.
+    :type  f:     ndarray of shape (nf,)
+    :param S:     One-sided PSDs.
+    :type  S:     ndarray of shape (..., nf)
+    :param order: Order of moment, frequencies of zero are excluded for negative orders.
+    :type  order: float
+    :param f_min: Minimum frequency, defaults to lowest frequency.
+    :type  f_min: float or None
+    :param f_max: Maximum frequency, defaults to highest frequency.
+    :type  f_max: float or None
+
+    :rtype: ndarray of shape S.shape[:-1]
+    """
+
+    idx = np.ones(len(f), dtype=bool)
+    if f_min is not None: idx &= f >= f_min
+    if f_max is not None: idx &= f <= f_max
+    if order < 0: idx &= f > 0
+
+    f = f[idx]
+    return trapezoid(f**order*S[..., idx], f, axis=-1)
+
+
+def parameters(f, S, f_min=None, f_max=None):
+
+    """ Computes spectral wave parameters from one-sided PSDs
+
+    :param f:     Frequencies.
+    :type  f:     ndarray of shape (nf,)
+    :param S:     One-sided PSDs.
+    :type  S:     ndarray of shape (..., nf)
+    :param f_min: Minimum frequency, see moment.
+    :type  f_min: float or None
+    :param f_max: Maximum frequency, see moment.
+    :type  f_max: float or None
+
+    :rtype: tuple of Hm0, Tp, and Tm-1,0 ndarrays of shape S.shape[:-1]
+    """
+
+    m0 = moment(f, S, 0, f_min, f_max)
+    m_1 = moment(f, S, -1, f_min, f_max)
+
+    idx = f > 0
+    if f_min is not None: idx &= f >= f_min
+    if f_max is not None: idx &= f <= f_max
+
+    if not np.any(idx):
+        msg = "No positive frequencies in range [%s, %s]." % (f_min, f_max)
+        raise FunException(msg, ValueError)
+
+    f_p = f[idx][np.argmax(S[..., idx], axis=-1)]
+
+    Hm0 = 4*np.sqrt(m0)
+    Tp = 1/f_p
+    with np.errstate(divide='ignore', invalid='ignore'): Tm10 = m_1/m0
+
+    return Hm0, Tp, Tm10
+
+
+def compute(eta, dt, n_seg=None, overlap=0.5, window='hann', detrend='linear', f_min=None, f_max=None,
+            batch_size=256):
+
+    """ Computes one-sided PSDs and spectral wave parameters of many series, see psd and
+        parameters for arguments
+
+    :rtype: tuple of f, S, Hm0, Tp, and Tm-1,0
+    """
+
+    f, S = psd(eta, dt, n_seg, overlap, window, detrend, batch_size)
+    Hm0, Tp, Tm10 = parameters(f, S, f_min, f_max)
+
+    return f, S, Hm0, Tp, Tm10
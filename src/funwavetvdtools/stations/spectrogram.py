@@ -0,0 +1,159 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file spectrogram.py
+#
+# @brief Short-time spectral analysis (spectrogram) of long station series
+#
+# @section description_spectrogram Description
+# Series are split into overlapping frames that are detrended, windowed and transformed
+# as in stations.spectra. Frames are processed in chunks, reading only the samples a
+# chunk needs (plus the overlap with the next chunk) from memory-mapped inputs, and each
+# chunk is written directly to an optional memory-mapped .npy output, so the whole
+# record and the whole spectrogram are never held in memory. Stations of an archive
+# are processed in parallel, each worker opening the memory-mapped archive itself so
+# series are never pickled.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+from funwavetvdtools.parallel.simple import simple as parallel_simple
+from funwavetvdtools.stations.spectra import _check_detrend, _check_dt, _check_segment, _segment_psd
+from funwavetvdtools.stations.archive import Archive
+
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+
+def compute(eta, dt, out_path=None, n_seg=256, overlap=0.5, window='hann', detrend='linear', chunk_size=2**16):
+
+    """ Computes spectrogram of a series as one-sided PSDs of overlapping frames
+
+    :param eta:        Series, e.g., memory-mapped row of a station archive.
+    :type  eta:        ndarray of shape (n,)
+    :param dt:         Time step of series.
+    :type  dt:         float
+    :param out_path:   Path to .npy output file, the spectrogram is kept in memory if None.
+    :type  out_path:   str or None
+    :param n_seg:      Length of frames.
+    :type  n_seg:      int
+    :param overlap:    Fraction of overlap between consecutive frames.
+    :type  overlap:    float
+    :param window:     Window applied to frames, see scipy.signal.get_window.
+    :type  window:     str or tuple
+    :param detrend:    Detrending of frames, 'linear', 'constant' or None.
+    :type  detrend:    str or None
+    :param chunk_size: Approximate number of samples read per chunk.
+    :type  chunk_size: int
+
+    :rtype: tuple of frequencies ndarray of shape (nf,), frame center times (relative to
+            start of series) ndarray of shape (n_frames,), and spectrogram ndarray or
+            memmap of shape (n_frames, nf)
+    """
+
+    if np.ndim(eta) != 1:
+        msg = "Series must be a 1-D array, got %d dimensions." % np.ndim(eta)
+        raise FunException(msg, ValueError)
+
+    _check_detrend(detrend)
+    dt = _check_dt(dt)
+    chunk_size = fv.convert_pos_def_int(chunk_size, 'chunk_size')
+
+    n = len(eta)
+    n_seg, step = _check_segment(n, n_seg, overlap)
+
+    fs = 1/dt
+    f = np.fft.rfftfreq(n_seg, dt)
+    win = get_window(window, n_seg)
+
+    n_frames = (n - n_seg)//step + 1
+    t = (np.arange(n_frames)*step + n_seg/2)*dt
+
+    shape = (n_frames, len(f))
+    if out_path is None:
+        S = np.empty(shape)
+    else:
+        S = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=shape)
+
+    # Frames per chunk, chunks are read with an overlap of n_seg - step samples
+    n_chunk = max(chunk_size//step, 1)
+    for k0 in range(0, n_frames, n_chunk):
+        k1 = min(k0 + n_chunk, n_frames)
+
+        i0 = k0*step
+        i1 = (k1 - 1)*step + n_seg
+        segs = sliding_window_view(np.asarray(eta[i0:i1], dtype=float), n_seg)[::step]
+
+        S[k0:k1] = _segment_psd(segs, fs, win, detrend)
+
+    if out_path is not None: S.flush()
+
+    return f, t, S
+
+
+def _compute_archive_job(archive_path, number, out_path, n_seg, overlap, window, detrend, chunk_size):
+
+    t, eta = Archive(archive_path).get(number)[:2]
+
+    if len(t) < 2:
+        msg = "Can not compute spectrogram of station %d with less than 2 time steps." % number
+        raise FunException(msg, ValueError)
+
+    # NOTE: Assuming uniform output interval, avoids reading whole time series
+    dt = (t[-1] - t[0])/(len(t) - 1)
+    _, t_frames, _ = compute(eta, dt, out_path, n_seg, overlap, window, detrend, chunk_size)
+
+    # NOTE: Returning only frame times avoids pickling spectrograms back from worker processes
+    return float(t[0]) + t_frames
+
+
+def compute_archive(archive_path, out_dir, numbers=None, n_seg=256, overlap=0.5, window='hann',
+                    detrend='linear', chunk_size=2**16, n_procs=1, is_p_bar=False):
+
+    """ Computes spectrograms of the eta series of stations in an archive, see
+        stations.archive. Each spectrogram is written to 'spectrogram_XXXXX.npy' in out_dir
+        and can be memory-mapped with np.load(fpath, mmap_mode='r').
+
+    :param archive_path: Path to archive directory.
+    :type  archive_path: str
+    :param out_dir:      Output directory, created if it does not exist.
+    :type  out_dir:      str
+    :param numbers:      Station numbers, all stations in archive if None.
+    :type  numbers:      list or None
+    :param n_procs:      Number of processes to run in parallel. Setting to 1 runs in serial mode.
+    :type  n_procs:      int
+    :param is_p_bar:     Flag for turning on tqdm progress bar.
+    :type  is_p_bar:     bool
+
+    See compute for remaining arguments.
+
+    :rtype: tuple of frequencies ndarray, list of frame time ndarrays, and list of output paths
+    """
+
+    n_procs = fv.convert_pos_def_int(n_procs, 'n_procs')
+
+    archive = Archive(archive_path)
+    if numbers is None: numbers = archive.numbers
+
+    for number in numbers:
+        if number not in archive:
+            msg = "Station %d not found in archive '%s'." % (number, archive_path)
+            raise FunException(msg, KeyError)
+
+    os.makedirs(out_dir, exist_ok=True)
+    out_paths = [os.path.join(out_dir, 'spectrogram_%05d.npy' % number) for number in numbers]
+
+    args_list = [(archive_path, number, out_path) for number, out_path in zip(numbers, out_paths)]
+    common_args = (n_seg, overlap, window, detrend, chunk_size)
+    t = parallel_simple(_compute_archive_job, n_procs, args_list, common_args,
+                        p_desc='Stations', is_p_bar=is_p_bar)
+
+    # Frequencies only depend on the frame length and time step of the first station
+    f = None
+    if len(numbers) > 0:
+        t0 = archive.get(numbers[0])[0]
+        f = np.fft.rfftfreq(n_seg, (t0[-1] - t0[0])/(len(t0) - 1))
+
+    return f, t, out_paths
@@ -1,15 +1,35 @@
 
 from funwavetvdtools.error import FunException
 import funwavetvdtools.validation as fv
+from funwavetvdtools.io.text import read_table
+import funwavetvdtools.io.cache as fc
+import funwavetvdtools.stations.archive as fa
+import funwavetvdtools.stations.spectra as fs
+from funwavetvdtools.parallel.simple import simple as parallel_simple, cpu_count
 
 import numpy as np
 import os 
 import copy
 
 
+def _parse_station_file(fpath):
+    # Storing columns t, eta, u, and v as rows for contiguous access to each series
+    return np.ascontiguousarray(read_table(fpath, usecols=range(4)).T)
+
+
+def _load_station_file(fpath, is_cache=False, cache_dir=None):
+    if is_cache: return fc.load(fpath, _parse_station_file, 'station', cache_dir)
+    return _parse_station_file(fpath)
+
+
+def _write_station_cache(fpath, cache_dir=None):
+    # NOTE: Returning None avoids pickling data back from worker processes
+    _load_station_file(fpath, True, cache_dir)
+
+
 class Station():
     
-    def __init__(self, output_dir, number, i, j, dx, dy, is_bathy_change=False):
+    def __init__(self, output_dir, number, i, j, dx, dy, is_bathy_change=False, is_cache=False, cache_dir=None):
 
         self._fpath = Station.get_file_path(output_dir, number)
         self._number = number 
@@ -30,6 +50,9 @@ class Station():
         self._h = None
 
         self._is_bathy_change = is_bathy_change
+
+        self._is_cache = is_cache
+        self._cache_dir = cache_dir
         
     def _check_args(self):
         pass
@@ -77,19 +100,22 @@ class Station():
         fv.check_fpath(fpath, 'station')
 
         try:
-            data = np.loadtxt(fpath)
-            self._is_data_loaded = True
-            self._n, _ = data.shape
-            self._t    = data[:,0]
-            self._eta  = data[:,1]
-            self._u    = data[:,2]
-            self._v    = data[:,3]
-
-
+            data = _load_station_file(fpath, self._is_cache, self._cache_dir)
         except Exception as e:
             msg = "Could not read station file '$s'. See traceback for more details." % fpath 
             raise FunException(msg, e)
 
+        self._set_data(*data)
+
+    def _set_data(self, t, eta, u, v):
+
+        self._n   = len(t)
+        self._t   = t
+        self._eta = eta
+        self._u   = u
+        self._v   = v
+        self._is_data_loaded = True
+
     @property
     def eta(self):
         self._load_data()
@@ -146,9 +172,12 @@ class Station():
 
 class Stations():
 
-    def __init__(self, file_path, output_dir, dx, dy, stations_numbers=None, bathy=None):
+    def __init__(self, file_path, output_dir, dx, dy, stations_numbers=None, bathy=None, is_cache=False, cache_dir=None,
+                 archive_path=None):
        
         self._fpath = file_path 
+        self._is_cache = is_cache
+        self._cache_dir = cache_dir
         idxs = self._read_file()
 
         if stations_numbers is None:
@@ -156,8 +185,11 @@ class Stations():
         else:
             idxs = [ (n, idxs[n]) for n in station_numbers]
 
+        self._block = None
         self._initialize_stations(file_path, output_dir, dx, dy, idxs, bathy)        
 
+        if archive_path is not None: self.load_archive(archive_path)
+
         
     def _read_file(self):
 
@@ -178,11 +210,121 @@ class Stations():
 
         stations = []
         for n, (i, j) in idxs:
-            station = Station(output_dir, n, i, j, dx, dy, bathy)
+            station = Station(output_dir, n, i, j, dx, dy, bathy, is_cache=self._is_cache, cache_dir=self._cache_dir)
             stations.append(station)
 
         self._list = stations
 
+    def load(self, n_workers=None, is_p_bar=False):
+
+        """ Parses all unloaded station files concurrently and assigns the data back to 
+            each station
+
+        :param n_workers: Number of processes, defaults to the number of available CPUs. Setting to 1
+                          loads stations in serial mode.
+        :type  n_workers: int or None
+        :param is_p_bar:  Flag for turning on tqdm progress bar 
+        :type  is_p_bar:  bool
+        """
+
+        stations = [sta for sta in self._list if not sta._is_data_loaded]
+        if len(stations) == 0: return
+
+        if n_workers is None: n_workers = cpu_count()
+        n_workers = min(fv.convert_pos_def_int(n_workers, 'n_workers'), len(stations))
+
+        fpaths = [sta._fpath for sta in stations]
+        for fpath in fpaths: fv.check_fpath(fpath, 'station')
+
+        if self._is_cache:
+            # Workers only parse files and write caches, caches are then memory-mapped
+            parallel_simple(_write_station_cache, n_workers, fpaths, self._cache_dir, 
+                            p_desc='Stations', is_p_bar=is_p_bar)
+            for sta in stations: sta._load_data()
+        else:
+            results = parallel_simple(_load_station_file, n_workers, fpaths, 
+                                      p_desc='Stations', is_p_bar=is_p_bar)
+            for sta, data in zip(stations, results): sta._set_data(*data)
+
+    def load_archive(self, path):
+
+        """ Assigns station series from a consolidated archive, see stations.archive, as
+            views of a single memory-mapped file instead of parsing each station file
+
+        :param path: Path to archive directory.
+        :type  path: str
+        """
+
+        archive = fa.Archive(path)
+
+        # Using stacked view of archive directly if stations are the same and in the same order,
+        # variable blocks are only contiguous for archives written with the variable layout
+        if archive.is_uniform and self.numbers == archive.numbers:
+            self._set_block(archive.stack())
+        else:
+            for sta in self._list: sta._set_data(*archive.get(sta.number))
+
+    def _set_block(self, block):
+        self._block = block
+        for k, sta in enumerate(self._list): sta._set_data(*block[:,k,:])
+
+    def stack(self, n_workers=1):
+
+        """ Stacks series of all stations into one contiguous (n_stations, n_time) array per 
+            variable. The series of each station are replaced by zero-copy row views.
+
+        :param n_workers: Number of processes for loading unloaded stations, see load.
+        :type  n_workers: int or None
+        """
+
+        if self._block is not None: return
+
+        self.load(n_workers)
+
+        lengths = set(sta.n for sta in self._list)
+        if len(lengths) > 1:
+            msg = "Can not stack stations as the lengths of the series are not the same."
+            raise FunException(msg, ValueError)
+
+        ns = len(self._list)
+        nt = lengths.pop() if ns > 0 else 0
+
+        block = np.empty([4, ns, nt])
+        for k, sta in enumerate(self._list):
+            block[0,k,:] = sta.t
+            block[1,k,:] = sta.eta
+            block[2,k,:] = sta.u
+            block[3,k,:] = sta.v
+
+        self._set_block(block)
+
+    def write_archive(self, path):
+
+        """ Packs the series of all stations into a consolidated archive, see stations.archive
+
+        :param path: Path to archive directory.
+        :type  path: str
+
+        :rtype: Archive
+        """
+        return fa.write(path, self)
+
+    def compute_spectra(self, **kwargs):
+
+        """ Computes one-sided PSDs and spectral wave parameters of the eta series of all
+            stations, see stations.spectra.compute for keyword arguments
+
+        :rtype: tuple of f, S, Hm0, Tp, and Tm-1,0
+        """
+
+        t = self.t
+        dt = np.diff(t, axis=1)
+        if dt.size == 0 or not np.allclose(dt, dt.flat[0]):
+            msg = "Can not compute spectra as the time steps of the series are not uniform."
+            raise FunException(msg, ValueError)
+
+        return fs.compute(self.eta, dt.flat[0], **kwargs)
+
     def update_bathy(self, bathy, t=None):
         for sta in self._list: sta.update_bathy(bathy, t)
 
@@ -206,6 +348,26 @@ class Stations():
     def h(self):
         return [s.h for s in self.list]
 
+    @property
+    def t(self):
+        self.stack()
+        return self._block[0]
+
+    @property
+    def eta(self):
+        self.stack()
+        return self._block[1]
+
+    @property
+    def u(self):
+        self.stack()
+        return self._block[2]
+
+    @property
+    def v(self):
+        self.stack()
+        return self._block[3]
+
 
 
 
@@ -322,7 +322,232 @@ def vertical_wall_response(application_type, gravity_constant, Hm0, water_level,
     print(['q: '+str(q)+' ( l/s per m )'])
 
 
+# ---------- BATCH EVALUATION ---------
+# Columnar evaluation of many structure/storm scenarios, one row per scenario. Rows are
+# grouped by structure type, material and slope with boolean masks and each group is
+# evaluated with vectorized math. Rows are processed in chunks to bound temporary memory.
 
+# Supported structure materials, integer material codes index this list
+MATERIALS = ['grass', 'concrete', 'basalt']
 
+# Supported structure types
+LEVEE = 1
+RUBBLEMOUND = 2
+FLOODWALL = 3
 
+# Empirical coefficients of each application type, 1- Mean Value Approach and 2- Design/Assesment Approach
+COEFFICIENTS = {
+    1: {'c1_runup': 1.65, 'c2_runup': 1.00, 'c3_runup': 0.80,                   # EurOtop Eq 5.1, 5.2, 5.6
+        'c1_ot': 0.023, 'c2_ot': 2.700, 'c3_ot': 0.090, 'c4_ot': 1.500,         # EurOtop Eq 5.10, 5.11
+        'a_std_ot': 0.15, 'b_std_ot': 0.10,                                     # EurOtop Eq 5.18 uncertainty
+        'c1_wall_ot': 0.047, 'c2_wall_ot': 2.350, 'c3_wall_ot': 0.050, 'c4_wall_ot': 2.780}, # EurOtop Eq 7.1, 7.5
+    2: {'c1_runup': 1.75, 'c2_runup': 1.07, 'c3_runup': 0.86,                   # EurOtop Eq 5.4, 5.5, 5.7
+        'c1_ot': 0.026, 'c2_ot': 2.500, 'c3_ot': 0.1035, 'c4_ot': 1.35,         # EurOtop Eq 5.12, 5.13
+        'a_std_ot': 0.15, 'b_std_ot': 0.10,                                     # EurOtop Eq 5.18 uncertainty
+        'c1_wall_ot': 0.047, 'c2_wall_ot': 2.350, 'c3_wall_ot': 0.050, 'c4_wall_ot': 2.780}, # EurOtop Eq 7.1, 7.5
+}
 
+
+def material_codes(structure_material):
+    ''' Convert structure materials to integer codes, i.e., indices of MATERIALS.
+
+    :param structure_material:         Structure materials as names or integer codes.
+    :type  structure_material:         ndarray
+    '''
+    structure_material = np.asarray(structure_material)
+    # Integer Codes Are Only Checked
+    if np.issubdtype(structure_material.dtype, np.integer):
+        codes = structure_material
+    else:
+        # Map Unique Names Instead Of Each Row
+        names, inverse = np.unique(structure_material, return_inverse=True)
+        lookup = np.array([MATERIALS.index(name) if name in MATERIALS else -1 for name in names])
+        codes = lookup[inverse].reshape(structure_material.shape)
+
+    if np.any((codes < 0) | (codes >= len(MATERIALS))):
+        raise ValueError('Unsupported material. Please use grass, concrete or basalt.')
+
+    return codes
+
+
+def roughness_influence_factor_batch(material_code, Hm0):
+    ''' Compute roughness influence factor of each row based on structure material code.
+        Follows EurOtop for grass, i.e., 1.15*Hm0**0.5 for Hm0 < 0.75 m and 1 otherwise.
+
+    :param material_code:         Structure material codes, see material_codes.
+    :type  material_code:         ndarray
+    :param Hm0:           Zeroth momment spectral wave height.
+    :type  Hm0:           ndarray
+    '''
+    # Concrete Including Asphalt & Concrete Blocks
+    gamma_f = np.ones(np.broadcast(material_code, Hm0).shape)
+    # Basalt
+    gamma_f[material_code == MATERIALS.index('basalt')] = 0.9
+    # Grass
+    is_grass = (material_code == MATERIALS.index('grass')) & (Hm0 < 0.75)
+    gamma_f[is_grass] = 1.15*np.broadcast_to(Hm0, gamma_f.shape)[is_grass]**0.5
+    return gamma_f
+
+
+def _levee_gentle_batch(g, Tm10, Hm0, Rc, slope, g_b, g_beta_r2p, g_beta_ot, g_f, g_v, g_star, c):
+    # Zero Moment Wave Length, Wave Steepness & Breaker Parameter
+    L_m10 = (g*Tm10**2)/(2*np.pi)
+    breaker_m10 = (1/slope)/np.sqrt(Hm0/L_m10)
+
+    # EurOtop Runup Eq 5.1 With A Maximum Of Eq 5.2, Negative R2p_max Failsafe
+    R2p_a = Hm0*c['c1_runup']*g_b*g_f*g_beta_r2p*breaker_m10
+    R2p_max = Hm0*c['c2_runup']*g_f*g_beta_r2p*(4-1.5/np.sqrt(g_b*breaker_m10))
+    R2p = np.where(R2p_max > 0, np.fmin(R2p_a, R2p_max), R2p_a)
+
+    # EurOtop Overtopping Eq 5.10 With A Minimum Of Eq 5.11
+    q_a = np.sqrt(g*Hm0**3)*(c['c1_ot']/np.sqrt(1/slope))*g_b*breaker_m10 \
+        * np.exp(-(c['c2_ot']*Rc/breaker_m10/Hm0/g_b/g_f/g_beta_ot/g_v)**1.3)
+    q_max = np.sqrt(g*Hm0**3)*c['c3_ot']*np.exp(-(c['c4_ot']*Rc/(Hm0*g_f*g_beta_ot*g_star))**1.3)
+
+    return R2p, np.fmin(q_max, q_a)
+
+
+def _levee_steep_batch(g, Hm0, Rc, slope, g_beta_ot, c, randn):
+    # EurOtop Runup Eq 5.6
+    R2p_a = np.fmin(Hm0*c['c3_runup']/(1/slope) + 1.6, 3*Hm0)
+    R2p = np.fmax(0, np.fmax(R2p_a, 1.8*Hm0))
+
+    # EurOtop Overtopping eq 5.18- assumes only smooth slopes, random uncertainty per row
+    a_a = 0.09 - 0.01*(2-(1/slope))**2.1
+    a = a_a + a_a*c['a_std_ot']*randn
+    b_a = np.fmin(1.5+0.42*(2-(1/slope))**1.5, 2.35)
+    b = b_a + b_a*c['b_std_ot']*randn
+    q = np.sqrt(g*Hm0**3)*a*np.exp(-(b*Rc/(Hm0*g_beta_ot))**1.3)
+
+    return R2p, q
+
+
+def _vertical_wall_batch(g, Hm0, Rc, w_depth, g_beta_ot, c):
+    # EurOtop Overtopping Eq 7.1 Without & Eq 7.5 With Foreshore Influence
+    q_no_fs = np.sqrt(g*Hm0**3)*c['c1_wall_ot']*np.exp(-((c['c2_wall_ot']/g_beta_ot)*Rc/Hm0)**1.3)
+    q_fs = np.sqrt(g*Hm0**3)*c['c3_wall_ot']*np.exp(-(c['c4_wall_ot']/g_beta_ot)*Rc/Hm0)
+    return np.where(w_depth/Hm0 > 4, q_no_fs, q_fs)
+
+
+def batch_response(structure_type, structure_material, Hm0, Tm10, water_level, structure_crest_elevation,
+                   structure_seaward_slope, structure_toe_elevation=None, application_type=1,
+                   gravity_constant=9.81, gamma_b=1, gamma_beta_runup=1, gamma_beta_overtoping=1,
+                   coefficients=None, rng=None, chunk_size=2**18):
+    ''' Compute runup and overtopping of many structure/storm scenarios. Inputs are columnar
+        arrays broadcast to one row per scenario. Levees and rubblemounds use levee_response
+        equations (gentle slopes for structure_seaward_slope >= 2, steep otherwise) and
+        floodwalls use vertical_wall_response equations. Nothing is printed.
+
+    :param structure_type:         Structure type. Supports 1- levee, 2- rubblemound, 3- flodwalls.
+    :type  structure_type:         ndarray
+    :param structure_material:         Structure material names or codes, see material_codes.
+    :type  structure_material:         ndarray
+    :param Hm0:           Zeroth momment spectral wave height.
+    :type  Hm0:           ndarray
+    :param Tm10:           Spectral wave period Tm-1,0.
+    :type  Tm10:           ndarray
+    :param water_level:           Still water level.
+    :type  water_level:           ndarray
+    :param structure_crest_elevation:         Structure crest elevation.
+    :type  structure_crest_elevation:         ndarray
+    :param structure_seaward_slope:         Structure seaward slope.
+    :type  structure_seaward_slope:         ndarray
+    :param structure_toe_elevation:         Structure toe elevation, only required for floodwalls.
+    :type  structure_toe_elevation:         ndarray
+    :param application_type:           Response computation context. Supports 1- Mean Value Approach and 2- Design/Assesment Approach.
+    :type  application_type:           int
+    :param gamma_b:           Berm influence factor.
+    :type  gamma_b:           ndarray
+    :param gamma_beta_runup:           Run-up influence factor for oblique wave attack.
+    :type  gamma_beta_runup:           ndarray
+    :param gamma_beta_overtoping:           Overtoping influence factor for oblique wave attack.
+    :type  gamma_beta_overtoping:           ndarray
+    :param coefficients:           Overrides of COEFFICIENTS, either scalars or one value per row.
+    :type  coefficients:           dict
+    :param rng:           Random generator or seed for the uncertainty of steep slope overtopping.
+    :type  rng:           numpy.random.Generator or int
+    :param chunk_size:           Number of rows evaluated at once.
+    :type  chunk_size:           int
+    :param R2p:           Runup exceeded by 2% of waves (m), NaN for floodwalls.
+    :type  R2p:           ndarray
+    :param q:           Mean overtopping discharge (l/s per m).
+    :type  q:           ndarray
+    '''
+    # ----- DEFINE EMPIRICAL COEFFICIENTS -----
+    if application_type not in COEFFICIENTS:
+        raise ValueError('Unsupported application type %s. Please use 1 or 2.' % application_type)
+
+    c = dict(COEFFICIENTS[application_type])
+    if coefficients is not None:
+        unknown = set(coefficients) - set(c)
+        if unknown: raise ValueError('Unsupported coefficients %s.' % sorted(unknown))
+        c.update(coefficients)
+
+    # ----- BROADCAST COLUMNS -----
+    if structure_toe_elevation is None: structure_toe_elevation = np.nan
+    columns = np.broadcast_arrays(*[np.atleast_1d(np.asarray(col)) for col in [
+        structure_type, material_codes(structure_material), Hm0, Tm10, water_level,
+        structure_crest_elevation, structure_seaward_slope, structure_toe_elevation,
+        gamma_b, gamma_beta_runup, gamma_beta_overtoping]])
+    n = columns[0].size
+    columns = [col.ravel() for col in columns]
+    c = {key: np.broadcast_to(val, n) if np.ndim(val) > 0 else val for key, val in c.items()}
+
+    is_supported = np.isin(columns[0], [LEVEE, RUBBLEMOUND, FLOODWALL])
+    if not np.all(is_supported):
+        raise ValueError('Unsupported structure type. Please use 1- levee, 2- rubblemound or 3- flodwalls.')
+
+    if np.any((columns[0] == FLOODWALL) & np.isnan(columns[7].astype(float))):
+        raise ValueError('Structure toe elevation is required for floodwalls.')
+
+    rng = np.random.default_rng(rng)
+    g = gravity_constant
+
+    R2p = np.full(n, np.nan)
+    q = np.empty(n)
+
+    for i0 in range(0, n, chunk_size):
+        i1 = min(i0 + chunk_size, n)
+        s_type, code, H, T, wl, crest, slope, toe, g_b, g_beta_r2p, g_beta_ot = [col[i0:i1] for col in columns]
+        c_chunk = {key: val[i0:i1] if np.ndim(val) > 0 else val for key, val in c.items()}
+
+        # Structure Freeboard, Negative Freeboard (Submergence) -> Overflow & Rc = 0
+        Rc = crest - wl
+        q_overflow = np.where(Rc < 0, 0.54*np.sqrt(g*np.abs(Rc)), 0)
+        Rc = np.fmax(Rc, 0)
+
+        # Influence Factors, Wall Influence Factor Not Applicable To Levee & Rubblemounds
+        g_f = roughness_influence_factor_batch(code, H)
+        g_v = g_star = 1
+
+        is_wall = s_type == FLOODWALL
+        is_gentle = ~is_wall & (slope >= 2)
+        is_steep = ~is_wall & (slope < 2)
+
+        q_chunk = np.empty(i1 - i0)
+        R2p_chunk = R2p[i0:i1]
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+
+            idx = np.nonzero(is_gentle)[0]
+            if len(idx) > 0:
+                c_idx = {key: val[idx] if np.ndim(val) > 0 else val for key, val in c_chunk.items()}
+                R2p_chunk[idx], q_chunk[idx] = _levee_gentle_batch(g, T[idx], H[idx], Rc[idx], slope[idx], 
+                                                                   g_b[idx], g_beta_r2p[idx], g_beta_ot[idx],
+                                                                   g_f[idx], g_v, g_star, c_idx)
+
+            idx = np.nonzero(is_steep)[0]
+            if len(idx) > 0:
+                c_idx = {key: val[idx] if np.ndim(val) > 0 else val for key, val in c_chunk.items()}
+                R2p_chunk[idx], q_chunk[idx] = _levee_steep_batch(g, H[idx], Rc[idx], slope[idx], g_beta_ot[idx], 
+                                                                  c_idx, rng.standard_normal(len(idx)))
+
+            idx = np.nonzero(is_wall)[0]
+            if len(idx) > 0:
+                c_idx = {key: val[idx] if np.ndim(val) > 0 else val for key, val in c_chunk.items()}
+                q_chunk[idx] = _vertical_wall_batch(g, H[idx], Rc[idx], wl[idx] - toe[idx], g_beta_ot[idx], c_idx)
+
+        # Meter To Liter Conversion
+        q[i0:i1] = (q_overflow + q_chunk)*1000
+
+    return R2p, q
@@ -0,0 +1,137 @@
+# Software is under the BSD 2-Clause "Simplified" License, see LICENSE file for further details.
+
+##
+# @file uncertainty.py
+#
+# @brief Monte Carlo uncertainty of EurOtop 2018 runup and overtopping
+#
+# @section description_uncertainty Description
+# Empirical coefficients and wave/structure inputs are drawn from distributions and
+# evaluated in vectorized batches with eurotop_2018.batch_response. Results are streamed
+# into bounded memory quantile sketches, so the number of samples is not limited by
+# memory. Each batch draws from its own child of a SeedSequence, hence results only
+# depend on the seed, number of samples and batch size, not the number of processes.
+#
+
+from funwavetvdtools.error import FunException
+import funwavetvdtools.validation as fv
+from funwavetvdtools.parallel.simple import simple as parallel_simple
+from funwavetvdtools.math.quantiles import QuantileSketch
+from funwavetvdtools.structures import eurotop_2018 as eurotop
+
+import numpy as np
+
+# Inputs of eurotop_2018.batch_response that can be sampled
+INPUTS = ['Hm0', 'Tm10', 'water_level', 'structure_crest_elevation', 'structure_seaward_slope',
+          'structure_toe_elevation', 'gamma_b', 'gamma_beta_runup', 'gamma_beta_overtoping']
+
+
+def _sample(spec, n, rng):
+    # Frozen scipy.stats distributions are sampled, anything else is a constant
+    if hasattr(spec, 'rvs'): return spec.rvs(size=n, random_state=rng)
+    return spec
+
+
+def _simulate_batch(seed, n, structure_type, structure_material, inputs, coefficients, application_type,
+                    gravity_constant, thresholds, sketch_size):
+
+    rng = np.random.default_rng(seed)
+
+    # NOTE: Sampling in sorted order so draws do not depend on dict ordering
+    kwargs = {name: _sample(inputs[name], n, rng) for name in sorted(inputs)}
+    coeffs = {name: _sample(coefficients[name], n, rng) for name in sorted(coefficients)}
+
+    R2p, q = eurotop.batch_response(np.full(n, structure_type), structure_material, application_type=application_type,
+                                    gravity_constant=gravity_constant, coefficients=coeffs, rng=rng, **kwargs)
+
+    r2p_sketch = QuantileSketch(sketch_size)
+    r2p_sketch.update(R2p)
+
+    q_sketch = QuantileSketch(sketch_size)
+    q_sketch.update(q)
+
+    # Number of samples exceeding each threshold
+    counts = None
+    if thresholds is not None: counts = n - np.searchsorted(np.sort(q), thresholds, side='right')
+
+    return r2p_sketch, q_sketch, counts
+
+
+def simulate(structure_type, structure_material, inputs, coefficients=None, n_samples=10**5, batch_size=10**4,
+             seed=None, thresholds=None, application_type=1, gravity_constant=9.81, sketch_size=1024,
+             n_procs=1, is_p_bar=False):
+
+    """ Monte Carlo simulation of runup and overtopping of a structure
+
+    :param structure_type:     Structure type, see eurotop_2018.batch_response.
+    :type  structure_type:     int
+    :param structure_material: Structure material, see eurotop_2018.batch_response.
+    :type  structure_material: str or int
+    :param inputs:             Inputs of eurotop_2018.batch_response, see INPUTS, as frozen
+                               scipy.stats distributions or constants.
+    :type  inputs:             dict
+    :param coefficients:       Empirical coefficients, see eurotop_2018.COEFFICIENTS, as frozen
+                               scipy.stats distributions or constants. Unspecified coefficients
+                               use the values of the application type.
+    :type  coefficients:       dict or None
+    :param n_samples:          Number of samples.
+    :type  n_samples:          int
+    :param batch_size:         Number of samples evaluated at once.
+    :type  batch_size:         int
+    :param seed:               Seed of the SeedSequence spawning the generator of each batch.
+    :type  seed:               int or None
+    :param thresholds:         Overtopping discharges (l/s per m) to compute exceedance probabilities of.
+    :type  thresholds:         ndarray or None
+    :param application_type:   Application type, see eurotop_2018.batch_response.
+    :type  application_type:   int
+    :param gravity_constant:   Gravitational acceleration.
+    :type  gravity_constant:   float
+    :param sketch_size:        Size of quantile sketches, see QuantileSketch.
+    :type  sketch_size:        int
+    :param n_procs:            Number of processes to run in parallel. Setting to 1 runs in serial mode.
+    :type  n_procs:            int
+    :param is_p_bar:           Flag for turning on tqdm progress bar.
+    :type  is_p_bar:           bool
+
+    :rtype: tuple of runup QuantileSketch, overtopping QuantileSketch, and exceedance
+            probabilities ndarray (None if thresholds is None)
+    """
+
+    n_samples = fv.convert_pos_def_int(n_samples, 'n_samples')
+    batch_size = fv.convert_pos_def_int(batch_size, 'batch_size')
+    n_procs = fv.convert_pos_def_int(n_procs, 'n_procs')
+
+    if coefficients is None: coefficients = {}
+
+    unknown = set(inputs) - set(INPUTS)
+    if unknown:
+        msg = "Unsupported inputs %s, must be in %s." % (sorted(unknown), INPUTS)
+        raise FunException(msg, ValueError)
+
+    for name in ['Hm0', 'Tm10', 'water_level', 'structure_crest_elevation', 'structure_seaward_slope']:
+        if name not in inputs:
+            msg = "Input '%s' is required." % name
+            raise FunException(msg, ValueError)
+
+    if thresholds is not None: thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+
+    sizes = [batch_size]*(n_samples//batch_size)
+    if n_samples % batch_size > 0: sizes.append(n_samples % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    args_list = list(zip(seeds, sizes))
+    common_args = (structure_type, structure_material, inputs, coefficients, application_type, gravity_constant,
+                   thresholds, sketch_size)
+    results = parallel_simple(_simulate_batch, n_procs, args_list, common_args,
+                              p_desc='Batches', is_p_bar=is_p_bar)
+
+    # Merging in batch order for results independent of the number of processes
+    r2p_sketch, q_sketch, counts = results[0]
+    for r2p_batch, q_batch, counts_batch in results[1:]:
+        r2p_sketch.merge(r2p_batch)
+        q_sketch.merge(q_batch)
+        if counts is not None: counts = counts + counts_batch
+
+    p_exceedance = None if counts is None else counts/n_samples
+
+    return r2p_sketch, q_sketch, p_exceedance
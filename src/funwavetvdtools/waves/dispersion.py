@@ -14,6 +14,7 @@ import funwavetvdtools.validation as fv
 from funwavetvdtools.math.newtonraphson import iterator
 from functools import partial
 
+import os
 import numpy as np
 
 
@@ -29,7 +30,7 @@ class Wave:
     def _check_args(cls, args, names):
 
         # Getting number of not None arguments
-        args_set = np.array(args) != None
+        args_set = np.array([arg is not None for arg in args])
         n_args = np.sum(args_set)
         # Return True if one group of arguments is set correctly 
         if n_args == 0: return False
@@ -176,6 +177,103 @@ class Wave:
         self._h = h
 
 
+class WaveArray():
+
+    """ Struct-of-arrays container of wave parameters. Exactly two of the wavenumber 
+        (or wavelength), angular frequency (or frequency or period), and depth must be 
+        specified, the remaining parameters are derived with vectorized math. Input 
+        arrays are broadcast together.
+
+    :param table: Optional lookup table used to compute the wavenumber from the angular
+                  frequency and depth instead of solving the dispersion relation.
+    :type  table: DispersionTable or None
+    """
+
+    __slots__ = ('_k', '_L', '_w', '_f', '_T', '_h')
+
+    def __init__(self, k=None, w=None, h=None, L=None, T=None, f=None, table=None):
+
+        is_k = Wave._check_args([k, L], ['wavenumber', 'wavelength'])
+        is_w = Wave._check_args([w, f, T], ['angular frequency', 'frequency', 'period'])
+        is_h = h is not None
+
+        num_args = is_k + is_w + is_h
+
+        if num_args > 2:
+            msg = "Too many wave parameters specified, only 2 required."
+            raise FunException(msg, NameError)
+
+        if num_args < 2:
+            msg = "Not enough wave parameters specified, only 2 required."
+            raise FunException(msg, NameError)
+
+        def to_array(val): return None if val is None else np.asarray(val, dtype=float)
+
+        k, L, w, f, T, h = [to_array(val) for val in (k, L, w, f, T, h)]
+
+        if is_k and k is None: k = 2*np.pi/L
+
+        if is_w and w is None: w = 2*np.pi*f if f is not None else 2*np.pi/T
+
+        if is_w and is_h:
+            w, h = np.broadcast_arrays(w, h)
+            k = _solve_k(w, h) if table is None else table.k(w, h)
+            k = np.asarray(k)
+        elif is_k and is_h:
+            k, h = np.broadcast_arrays(k, h)
+            w = np.sqrt(g*k*np.tanh(k*h))
+        else:
+            k, w = np.broadcast_arrays(k, w)
+            # NOTE: Deep water limit, w^2 >= g k, has no finite depth
+            with np.errstate(divide='ignore', invalid='ignore'):
+                h = np.arctanh(w**2/(g*k))/k
+
+        with np.errstate(divide='ignore'):
+            self._set(k, 2*np.pi/k, w, w/(2*np.pi), 2*np.pi/w, h)
+
+    def _set(self, k, L, w, f, T, h):
+        self._k = k
+        self._L = L
+        self._w = w
+        self._f = f
+        self._T = T
+        self._h = h
+
+    @classmethod
+    def _from_arrays(cls, *arrays):
+        # Creating object from consistent arrays without rederiving parameters, e.g., slicing
+        obj = cls.__new__(cls)
+        obj._set(*arrays)
+        return obj
+
+    @property
+    def k(self): return self._k
+
+    @property
+    def L(self): return self._L
+
+    @property
+    def w(self): return self._w
+
+    @property
+    def f(self): return self._f
+
+    @property
+    def T(self): return self._T
+
+    @property
+    def h(self): return self._h
+
+    @property
+    def shape(self): return self._k.shape
+
+    def __len__(self): return len(self._k)
+
+    def __getitem__(self, key):
+        arrays = (self._k, self._L, self._w, self._f, self._T, self._h)
+        return WaveArray._from_arrays(*[arr[key] for arr in arrays])
+
+
 def _f(w, k, h):
     return g*k*np.tanh(k*h) - w**2
 
@@ -186,6 +284,30 @@ def _dfdk(w, k, h):
     tanh = np.tanh(k*h)
     return g*(tanh + k*h*(1-tanh**2))
 
+
+def _k_explicit(w, h):
+    # Fenton and McKee (1990) explicit approximation, accurate to about 1.5%
+    return (w**2/g)/np.tanh((w*np.sqrt(h/g))**1.5)**(2/3)
+
+
+def _solve_k(w, h, tolerence=10**-8, max_iterations=10):
+
+    # Solving all points at once with a vectorized Newton-Raphson iteration starting 
+    # from explicit approximation, typically converging in 2 to 3 iterations 
+    w, h = np.broadcast_arrays(np.asarray(w, dtype=float), np.asarray(h, dtype=float))
+
+    k = np.zeros(w.shape)
+    is_wave = w != 0
+
+    if np.any(is_wave):
+        wi = w[is_wave]
+        hi = h[is_wave]
+        def f(x): return _f(k=x, h=hi, w=wi)
+        def df(x): return _dfdk(k=x, h=hi, w=wi)
+        k[is_wave] = iterator(_k_explicit(wi, hi), f, df, tolerence, max_iterations)
+
+    return k[()] if k.ndim == 0 else k
+
 def _check_args(k, L, w, T, h):
 
     num_args = 0
@@ -224,6 +346,143 @@ def _check_args(k, L, w, T, h):
     return k, w, h, is_wave, is_freq, is_h
 
 
+class DispersionTable():
+
+    """ Lookup table of the dimensionless dispersion relation kh = F(w^2 h/g), i.e., the
+        solution of kh tanh(kh) = w^2 h/g, tabulated on a uniform grid in log space. 
+        Queries are answered by linear interpolation in log-log space in O(1) per point. 
+        The table is refined until the relative error of kh is below the tolerence. 
+        Points outside the table range are solved directly.
+
+    :param tolerence:  Maximum relative error of interpolated kh.
+    :type  tolerence:  float
+    :param x_min:      Lower bound of w^2 h/g in table.
+    :type  x_min:      float
+    :param x_max:      Upper bound of w^2 h/g in table.
+    :type  x_max:      float
+    :param cache_path: Path of .npz file to load table from, if parameters match, or save 
+                       table to otherwise. 
+    :type  cache_path: str or None
+    """
+
+    def __init__(self, tolerence=10**-6, x_min=10**-6, x_max=50, cache_path=None):
+
+        if not 0 < x_min < x_max:
+            msg = "Invalid table range, x_min=%g and x_max=%g, expected 0 < x_min < x_max." % (x_min, x_max)
+            raise FunException(msg, ValueError)
+
+        self._tolerence = tolerence
+        self._lx_min = np.log(x_min)
+        self._lx_max = np.log(x_max)
+
+        if cache_path is not None and self._load(cache_path): return
+        
+        self._build()
+
+        if cache_path is not None: self.save(cache_path)
+
+    @staticmethod
+    def _solve(x):
+        # Solving with h=1 so k=kh and w=sqrt(g x)
+        return _solve_k(np.sqrt(g*x), 1.0, tolerence=10**-14, max_iterations=50)
+
+    def _build(self):
+
+        n = 256
+        while True:
+            lx = np.linspace(self._lx_min, self._lx_max, n)
+            self._set_table(np.log(self._solve(np.exp(lx))))
+
+            # Checking error at mid-points where linear interpolation error is largest
+            x_mid = np.exp(0.5*(lx[1:] + lx[:-1]))
+            err = np.max(np.abs(self.kh(x_mid)/self._solve(x_mid) - 1))
+
+            if err < self._tolerence or n >= 2**24: break
+            # NOTE: Error scales with square of spacing
+            n = int(n*max(2, np.sqrt(2*err/self._tolerence)))
+
+        self._max_error = err
+
+    def _set_table(self, ly):
+        self._ly = ly
+        self._dlx = (self._lx_max - self._lx_min)/(len(ly)-1)
+
+    def _load(self, fpath):
+
+        if not os.path.isfile(fpath): return False
+
+        with np.load(fpath) as data:
+            params = (float(data['tolerence']), float(data['lx_min']), float(data['lx_max']))
+            if params != (self._tolerence, self._lx_min, self._lx_max): return False
+            self._set_table(data['ly'])
+            self._max_error = float(data['max_error'])
+
+        return True
+
+    def save(self, fpath):
+        np.savez(fpath, ly=self._ly, tolerence=self._tolerence, lx_min=self._lx_min, 
+                 lx_max=self._lx_max, max_error=self._max_error)
+
+    @property
+    def n(self): return len(self._ly)
+
+    @property
+    def max_error(self): return self._max_error
+
+    def kh(self, x):
+
+        """ Interpolates kh for dimensionless depth x = w^2 h/g
+
+        :param x: Dimensionless depth.
+        :type  x: float or ndarray
+
+        :rtype: float or ndarray
+        """
+
+        x = np.asarray(x, dtype=float)
+        kh = np.zeros(x.shape)
+
+        with np.errstate(divide='ignore'):
+            lx = np.log(x)
+        
+        is_in = (lx >= self._lx_min) & (lx <= self._lx_max)
+        is_all_in = np.all(is_in)
+        if not is_all_in: lx = lx[is_in]
+
+        # Computing table index directly from uniform spacing 
+        s = (lx - self._lx_min)/self._dlx
+        i = np.minimum(s.astype(int), len(self._ly)-2)
+        s -= i
+        ly0 = self._ly[i]
+        ly = ly0 + s*(self._ly[i+1] - ly0)
+
+        if is_all_in: 
+            kh = np.exp(ly)
+        else:
+            kh[is_in] = np.exp(ly)
+
+        is_out = ~is_in & (x > 0)
+        if np.any(is_out): kh[is_out] = self._solve(x[is_out])
+
+        return kh[()] if kh.ndim == 0 else kh
+
+    def k(self, w, h):
+
+        """ Computes wavenumber from angular frequency and depth
+
+        :param w: Angular frequency.
+        :type  w: float or ndarray
+        :param h: Depth.
+        :type  h: float or ndarray
+
+        :rtype: float or ndarray
+        """
+
+        w, h = np.broadcast_arrays(np.asarray(w, dtype=float), np.asarray(h, dtype=float))
+        k = self.kh(w**2*h/g)/h
+        return k[()] if k.ndim == 0 else k
+
+
 def shallow(k=None, w=None, h=None, L=None, T=None, f=None):
 
     wave = Wave(k=k, w=w, h=h, L=L, T=T, f=f)
@@ -252,11 +511,8 @@ def full(k=None, w=None, h=None, L=None, T=None, f=None, tolerence=10**-8, max_i
 
 
     if wave._is_h and wave._is_w:
-        # Compute wavenumber
-        def f(x): return _f(k=x, h=wave.h, w=wave.w)
-        def df(x): return _dfdk(k=x, h=wave.h, w=wave.w)
-        k0 = shallow(h=wave.h, w=wave.w).k
-        wave.k = iterator(k0, f, df)
+        # Compute wavenumber, w and h may be arrays
+        wave.k = _solve_k(wave.w, wave.h, tolerence, max_iterations)
 
     elif wave._is_h and wave._is_k:
         # Compute freqency